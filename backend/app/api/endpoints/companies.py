@@ -1,20 +1,36 @@
 # backend/app/api/endpoints/companies.py
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import Optional, List
-from app.core.database import get_db
-from app.schemas.company import CompanyDetail, CompanyAnalytics, FinancialReport, CompanySearch
-from app.schemas.search import SearchResponse
-from app.services.database_service import DatabaseService
+from typing import Optional, List, Dict, Any, Tuple, Callable, Awaitable
+from app.core.admin import require_admin_token
+from app.core.config import settings
+from app.core.database import get_db, SessionLocal
+from app.schemas.company import (
+    CompanyDetail, CompanyAnalytics, FinancialReport, CompanySearch, BatchLookupRequest
+)
+from app.schemas.search import SearchResponse, SearchMode, SearchTotalMode, SuggestResponse, CompanySuggestion
+from app.services.database_service import DatabaseService, InvalidCursorError
 from app.services.datanewton_service import DataNewtonService
 from app.services.rusprofile_service import RusProfileService
-from app.services.prediction_service import FinancialPredictionService
+from app.services.prediction_service import (
+    FinancialPredictionService, MODEL_VERSION, prediction_response, prediction_row, store_predictions
+)
+from app.services.report_service import get_company_reports, load_prediction_reports
 from app.services.ai_analysis_service import AIAnalysisService
+from app.services.suggest_service import suggest_index
+from app.services.similarity_service import similarity_index
+from app.services.api_cache_service import ApiCacheService
+from app.services.okved_page_cache_service import OkvedPageCacheService
+from app.services.industry_percentile_service import IndustryPercentileService, ALL_REGIONS
 from fastapi.responses import StreamingResponse
+import asyncio
 import json
 
 router = APIRouter()
 
+# ИНН пакетного поиска, читаемых из БД одним запросом (и отправляемых одной порцией ответа)
+BATCH_LOOKUP_CHUNK = 500
+
 
 @router.get("/{inn}/ai-analysis")
 async def get_company_ai_analysis(
@@ -28,32 +44,41 @@ async def get_company_ai_analysis(
         if not db_company:
             raise HTTPException(status_code=404, detail="Компания не найдена")
 
-        # Получаем полную аналитику
+        # Соединение с БД возвращаем в пул на время обращений к внешним API
+        db.close()
+
+        # Получаем полную аналитику: внешние источники запрашиваются одновременно
         datanewton_service = DataNewtonService()
         rusprofile_service = RusProfileService()
 
-        counterparty_data = await datanewton_service.get_counterparty(inn)
-        finance_data = await datanewton_service.get_finance(inn)
-        rusprofile_data = await rusprofile_service.get_company_data(inn)
+        # Финансы - из таблицы api_report, из DataNewton только если их нет или они устарели
+        sources, missing_sources = await fetch_external_sources({
+            "counterparty": lambda: datanewton_service.get_counterparty(inn),
+            "finance": lambda: get_company_reports(db_company.company_id, inn),
+            "rusprofile": lambda: rusprofile_service.get_company_data(inn),
+        })
+        counterparty_data = sources.get("counterparty")
+        rusprofile_data = sources.get("rusprofile")
 
         # Формируем детальную информацию о компании
         company_detail = create_company_detail_from_db_and_api(
             db_company, counterparty_data, rusprofile_data, inn
         )
 
-        # Преобразуем финансовые данные
-        reports = []
-        if finance_data:
-            reports = convert_api_finance_to_reports(finance_data)
+        reports = sources.get("finance") or []
 
         # Получаем похожие компании
-        similar_companies = get_similar_companies_from_db(db, db_company.okved, inn)
+        similar_companies = get_similar_companies_from_db(db, db_company, inn)
 
         # Создаем ИИ-сервис и запускаем анализ
         ai_service = AIAnalysisService()
 
         def generate_analysis():
             try:
+                # Источники, не ответившие вовремя: анализ строится без их данных
+                if missing_sources:
+                    yield f"data: {json.dumps({'missing_sources': missing_sources})}\n\n"
+
                 for chunk in ai_service.analyze_company_stream(
                         company_detail, reports, similar_companies
                 ):
@@ -89,7 +114,14 @@ async def search_companies(
         okved: Optional[str] = Query(None, description="Код ОКВЭД (частичное совпадение)"),
         inn: Optional[str] = Query(None, description="ИНН компании"),
         region: Optional[str] = Query(None, description="Код региона"),
+        mode: SearchMode = Query("words", description="Режим поиска по названию: words - целые слова, "
+                                                      "ranked - полнотекстовый с сортировкой по релевантности"),
         limit: int = Query(100, description="Количество результатов", le=500),
+        cursor: Optional[str] = Query(None, description="Курсор следующей страницы из предыдущего ответа"),
+        total_mode: Optional[SearchTotalMode] = Query(None, description="Подсчет total: exact - точно, "
+                                                                        "estimate - оценка планировщика, "
+                                                                        "capped - не больше предела"),
+        facets: bool = Query(False, description="Добавить число найденных компаний по региону и разделу ОКВЭД"),
         db: Session = Depends(get_db)
 ):
     """
@@ -110,11 +142,13 @@ async def search_companies(
         if not search_params:
             raise HTTPException(status_code=400, detail="Необходимо указать хотя бы один параметр поиска")
 
-        companies, total = DatabaseService.search_companies_flexible(db, search_params, limit)
+        page = DatabaseService.search_companies_flexible(
+            db, search_params, limit, mode, cursor, total_mode, facets
+        )
 
         # Преобразуем в схему ответа
         company_list = []
-        for company in companies:
+        for company in page.companies:
             company_search = CompanySearch(
                 company_id=company.company_id,
                 name=company.name,
@@ -127,10 +161,15 @@ async def search_companies(
 
         return SearchResponse(
             companies=company_list,
-            total=total
+            total=page.total,
+            total_exact=page.total_exact,
+            next_cursor=page.next_cursor,
+            facets=page.facets
         )
     except HTTPException:
         raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка поиска: {str(e)}")
 
@@ -138,7 +177,13 @@ async def search_companies(
 @router.get("/search/by-name", response_model=SearchResponse)
 async def search_companies_by_name(
         name: str = Query(..., description="Название компании для поиска"),
+        mode: SearchMode = Query("words", description="Режим поиска: words - целые слова, "
+                                                      "ranked - полнотекстовый с сортировкой по релевантности"),
         limit: int = Query(100, description="Количество результатов", le=500),
+        cursor: Optional[str] = Query(None, description="Курсор следующей страницы из предыдущего ответа"),
+        total_mode: Optional[SearchTotalMode] = Query(None, description="Подсчет total: exact - точно, "
+                                                                        "estimate - оценка планировщика, "
+                                                                        "capped - не больше предела"),
         db: Session = Depends(get_db)
 ):
     """
@@ -148,10 +193,10 @@ async def search_companies_by_name(
         if not name or len(name.strip()) < 2:
             raise HTTPException(status_code=400, detail="Название должно содержать минимум 2 символа")
 
-        companies, total = DatabaseService.search_by_name(db, name.strip(), limit)
+        page = DatabaseService.search_by_name(db, name.strip(), limit, mode, cursor, total_mode)
 
         company_list = []
-        for company in companies:
+        for company in page.companies:
             company_search = CompanySearch(
                 company_id=company.company_id,
                 name=company.name,
@@ -164,10 +209,14 @@ async def search_companies_by_name(
 
         return SearchResponse(
             companies=company_list,
-            total=total
+            total=page.total,
+            total_exact=page.total_exact,
+            next_cursor=page.next_cursor
         )
     except HTTPException:
         raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка поиска по названию: {str(e)}")
 
@@ -176,6 +225,10 @@ async def search_companies_by_name(
 async def search_companies_by_okved(
         okved: str = Query(..., description="Код ОКВЭД для поиска"),
         limit: int = Query(100, description="Количество результатов", le=500),
+        cursor: Optional[str] = Query(None, description="Курсор следующей страницы из предыдущего ответа"),
+        total_mode: Optional[SearchTotalMode] = Query(None, description="Подсчет total: exact - точно, "
+                                                                        "estimate - оценка планировщика, "
+                                                                        "capped - не больше предела"),
         db: Session = Depends(get_db)
 ):
     """
@@ -185,10 +238,10 @@ async def search_companies_by_okved(
         if not okved or len(okved.strip()) < 2:
             raise HTTPException(status_code=400, detail="Код ОКВЭД должен содержать минимум 2 символа")
 
-        companies, total = DatabaseService.search_by_okved(db, okved.strip(), limit)
+        page = DatabaseService.search_by_okved(db, okved.strip(), limit, cursor, total_mode)
 
         company_list = []
-        for company in companies:
+        for company in page.companies:
             company_search = CompanySearch(
                 company_id=company.company_id,
                 name=company.name,
@@ -201,14 +254,100 @@ async def search_companies_by_okved(
 
         return SearchResponse(
             companies=company_list,
-            total=total
+            total=page.total,
+            total_exact=page.total_exact,
+            next_cursor=page.next_cursor
         )
     except HTTPException:
         raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка поиска по ОКВЭД: {str(e)}")
 
 
+@router.get("/suggest", response_model=SuggestResponse)
+async def suggest_companies(
+        q: str = Query(..., description="Начало названия (любого слова) или ИНН"),
+        limit: int = Query(10, description="Количество подсказок", ge=1, le=50)
+):
+    """
+    Подсказки при вводе: поиск по префиксному индексу в памяти, без запросов к БД
+    """
+    if not suggest_index.ready:
+        raise HTTPException(status_code=503, detail="Индекс подсказок еще строится")
+
+    if len(q.strip()) < 2:
+        return SuggestResponse(items=[])
+
+    return SuggestResponse(items=[
+        CompanySuggestion(company_id=item.company_id, name=item.name, inn=item.inn)
+        for item in suggest_index.search(q, limit)
+    ])
+
+
+@router.post("/batch")
+async def get_companies_batch(request: BatchLookupRequest):
+    """
+    Пакетный поиск компаний по списку ИНН.
+    Ответ - NDJSON: по строке на каждый уникальный ИНН в порядке запроса
+    """
+    inns = list(dict.fromkeys(
+        DatabaseService.normalize_inn(inn) for inn in request.inns if inn and inn.strip()
+    ))
+    if not inns:
+        raise HTTPException(status_code=400, detail="Список ИНН пуст")
+
+    return StreamingResponse(
+        batch_lookup_lines(inns, request.include_reports), media_type="application/x-ndjson"
+    )
+
+
+def batch_lookup_lines(inns: List[str], include_reports: bool):
+    """
+    Строки NDJSON пакетного поиска. ИНН читаются из БД пачками по BATCH_LOOKUP_CHUNK,
+    и строки пачки отправляются сразу, не дожидаясь остальных
+    """
+    db = SessionLocal()
+    try:
+        for start in range(0, len(inns), BATCH_LOOKUP_CHUNK):
+            chunk = inns[start:start + BATCH_LOOKUP_CHUNK]
+            companies = DatabaseService.get_companies_by_inns(db, chunk)
+
+            reports = {}
+            if include_reports and companies:
+                reports = DatabaseService.get_latest_reports(
+                    db, [company.company_id for company in companies.values()]
+                )
+
+            lines = []
+            for inn in chunk:
+                company = companies.get(inn)
+                item = {"inn": inn, "found": company is not None, "company": None}
+                if company:
+                    item["company"] = CompanySearch(
+                        company_id=company.company_id,
+                        name=company.name,
+                        inn=company.inn,
+                        okved=company.okved,
+                        okved_o=company.okved_o,
+                        location=f"Код региона: {company.kod_re}" if company.kod_re else None
+                    ).model_dump()
+                if include_reports:
+                    report = reports.get(company.company_id) if company else None
+                    item["report"] = FinancialReport.model_validate(report).model_dump() if report else None
+                lines.append(json.dumps(item, ensure_ascii=False) + "\n")
+
+            yield "".join(lines)
+
+    except Exception as e:
+        # Статус ответа уже отправлен: ошибка - последней строкой
+        print(f"Ошибка пакетного поиска: {e}")
+        yield json.dumps({"error": f"Ошибка пакетного поиска: {str(e)}"}, ensure_ascii=False) + "\n"
+    finally:
+        db.close()
+
+
 @router.get("/{inn}", response_model=CompanyDetail)
 async def get_company(
         inn: str,
@@ -221,12 +360,19 @@ async def get_company(
         if not company:
             raise HTTPException(status_code=404, detail="Компания не найдена")
 
-        # Получаем данные из внешних API
+        # Соединение с БД возвращаем в пул на время обращений к внешним API
+        db.close()
+
+        # Получаем данные из внешних API (одновременно)
         datanewton_service = DataNewtonService()
         rusprofile_service = RusProfileService()
 
-        counterparty_data = await datanewton_service.get_counterparty(inn)
-        rusprofile_data = await rusprofile_service.get_company_data(inn)
+        sources, _ = await fetch_external_sources({
+            "counterparty": lambda: datanewton_service.get_counterparty(inn),
+            "rusprofile": lambda: rusprofile_service.get_company_data(inn),
+        })
+        counterparty_data = sources.get("counterparty")
+        rusprofile_data = sources.get("rusprofile")
 
         # Формируем ответ
         company_detail = CompanyDetail(
@@ -277,34 +423,37 @@ async def get_company_analytics(
         if not db_company:
             raise HTTPException(status_code=404, detail="Компания не найдена в базе данных")
 
+        # Соединение с БД возвращаем в пул на время обращений к внешним API
+        db.close()
+
         # Получаем данные из внешних API
         datanewton_service = DataNewtonService()
         rusprofile_service = RusProfileService()
 
-        # Получаем основную информацию о компании
-        counterparty_data = await datanewton_service.get_counterparty(inn)
-
-        # Получаем финансовые данные из API
-        finance_data = await datanewton_service.get_finance(inn)
-
-        # Получаем данные из RusProfile
-        rusprofile_data = await rusprofile_service.get_company_data(inn)
+        # Основная информация, финансы и RusProfile запрашиваются одновременно
+        # с общим сроком: время ответа - самый долгий источник, а не сумма
+        # Финансы - из таблицы api_report, из DataNewton только если их нет или они устарели
+        sources, missing_sources = await fetch_external_sources({
+            "counterparty": lambda: datanewton_service.get_counterparty(inn),
+            "finance": lambda: get_company_reports(db_company.company_id, inn),
+            "rusprofile": lambda: rusprofile_service.get_company_data(inn),
+        })
+        counterparty_data = sources.get("counterparty")
+        rusprofile_data = sources.get("rusprofile")
 
         # ИСПРАВЛЕНИЕ: Формируем детальную информацию о компании, используя данные из БД как основу
         company_detail = create_company_detail_from_db_and_api(
             db_company, counterparty_data, rusprofile_data, inn
         )
 
-        # Преобразуем финансовые данные из API в отчеты (ИСПРАВЛЕНИЕ: умножаем на 1000)
-        reports = []
-        if finance_data:
-            reports = convert_api_finance_to_reports(finance_data)
+        # Отчеты в рублях (ИСПРАВЛЕНИЕ: суммы API умножены на 1000 при преобразовании)
+        reports = sources.get("finance") or []
 
         # Подготавливаем данные для графиков (ИСПРАВЛЕНИЕ: умножаем на 1000)
         chart_data = prepare_chart_data(reports)
 
         # ИСПРАВЛЕНИЕ: Получаем похожие компании используя ОКВЭД из БД
-        similar_companies = get_similar_companies_from_db(db, db_company.okved, inn)
+        similar_companies = get_similar_companies_from_db(db, db_company, inn)
 
         # НОВОЕ: Генерируем предсказание на следующий год
         predicted_data = None
@@ -320,7 +469,8 @@ async def get_company_analytics(
             reports=reports,
             chart_data=chart_data,
             similar_companies=similar_companies,
-            predicted_data=predicted_data  # НОВОЕ
+            predicted_data=predicted_data,  # НОВОЕ
+            missing_sources=missing_sources
         )
 
     except HTTPException:
@@ -329,28 +479,74 @@ async def get_company_analytics(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/{inn}/refresh", dependencies=[Depends(require_admin_token)])
+async def refresh_company_cache(inn: str):
+    """Запросить данные DataNewton и RusProfile заново, минуя кэш api_cache и отчеты в api_report, и сохранить их"""
+    datanewton_service = DataNewtonService()
+    rusprofile_service = RusProfileService()
+    company_id = await asyncio.to_thread(find_company_id, inn)
+    sources, missing_sources = await fetch_external_sources({
+        "counterparty": lambda: datanewton_service.get_counterparty(inn, refresh=True),
+        "finance": lambda: get_company_reports(company_id, inn, refresh=True),
+        "rusprofile": lambda: rusprofile_service.get_company_data(inn, refresh=True),
+    })
+    return {"inn": inn.strip(), "refreshed": list(sources), "failed": missing_sources}
+
+
+@router.delete("/{inn}/cache", dependencies=[Depends(require_admin_token)])
+async def purge_company_cache(
+        inn: str,
+        endpoint: Optional[str] = Query(None, description="Метод API (counterparty, finance, rusprofile); по умолчанию все")
+):
+    """Удалить сохраненные ответы внешних API по компании"""
+    deleted = await asyncio.to_thread(ApiCacheService.purge, inn.strip(), endpoint)
+    return {"inn": inn.strip(), "deleted": deleted}
+
+
+@router.delete("/cache", dependencies=[Depends(require_admin_token)])
+async def purge_api_cache(
+        endpoint: Optional[str] = Query(
+            None, description="Метод API (counterparty, finance, rusprofile) или okved_page - страницы ОКВЭД; по умолчанию все"
+        )
+):
+    """Удалить все сохраненные ответы внешних API (или ответы одного метода)"""
+    deleted = 0
+    if endpoint in (None, "okved_page"):
+        deleted += await asyncio.to_thread(OkvedPageCacheService.purge)
+    if endpoint != "okved_page":
+        deleted += await asyncio.to_thread(ApiCacheService.purge, None, endpoint)
+    return {"deleted": deleted}
+
+
 # НОВЫЙ ЭНДПОИНТ: Получение предсказания отдельно
 @router.get("/{inn}/prediction")
 async def get_company_prediction(
         inn: str,
         db: Session = Depends(get_db)
 ):
-    """Получить предсказание финансовых показателей на следующий год"""
+    """
+    Получить предсказание финансовых показателей на следующий год.
+    Сначала - рассчитанное заранее (таблица prediction), иначе расчет по отчетам с записью результата
+    """
     try:
-        # Получаем компанию из БД
-        db_company = DatabaseService.get_company_by_inn(db, inn)
+        # Компания и сохраненное предсказание - одним запросом по индексу ИНН
+        db_company, stored = DatabaseService.get_company_with_prediction(db, inn, MODEL_VERSION)
         if not db_company:
             raise HTTPException(status_code=404, detail="Компания не найдена")
 
-        # Получаем финансовые данные
-        datanewton_service = DataNewtonService()
-        finance_data = await datanewton_service.get_finance(inn)
+        # Соединение с БД возвращаем в пул на время обращений к внешним API
+        db.close()
 
-        if not finance_data:
-            raise HTTPException(status_code=404, detail="Финансовые данные не найдены")
+        if stored is not None:
+            return prediction_response(stored)
+
+        # Финансы DataNewton обновляются в api_report, если их нет или они устарели; предсказание -
+        # по тем же отчетам, что и в app.cli.compute_predictions (api_report и выгрузка report)
+        await get_company_reports(db_company.company_id, inn)
+        reports = (await asyncio.to_thread(load_prediction_reports, [db_company.company_id]))[0]
 
-        # Преобразуем в отчеты
-        reports = convert_api_finance_to_reports(finance_data)
+        if not reports:
+            raise HTTPException(status_code=404, detail="Финансовые данные не найдены")
 
         if len(reports) < 2:
             raise HTTPException(status_code=400, detail="Недостаточно данных для предсказания (нужно минимум 2 года)")
@@ -364,12 +560,13 @@ async def get_company_prediction(
         # Получаем объяснение предсказания
         explanation = FinancialPredictionService.get_prediction_explanation(predicted_data, reports)
 
-        return {
-            "prediction": predicted_data,
-            "explanation": explanation,
-            "base_data_years": len(reports),
-            "last_year": max(report.year for report in reports)
-        }
+        row = prediction_row(db_company.company_id, predicted_data, explanation, reports)
+        try:
+            await asyncio.to_thread(store_predictions, [row])
+        except Exception as e:
+            print(f"Ошибка сохранения предсказания компании {db_company.company_id}: {e}")
+
+        return prediction_response(row)
 
     except HTTPException:
         raise
@@ -377,6 +574,77 @@ async def get_company_prediction(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/{inn}/percentiles")
+async def get_company_percentiles(
+        inn: str,
+        year: Optional[int] = Query(None, description="Год отчета; по умолчанию последний в базе"),
+        db: Session = Depends(get_db)
+):
+    """
+    Место показателей компании среди компаний того же класса ОКВЭД: в ее регионе и по всей России.
+    Распределения рассчитаны заранее (app.cli.compute_percentiles), отчеты - из таблицы report
+    """
+    found = IndustryPercentileService.get_company_class(db, DatabaseService.normalize_inn(inn))
+    if not found:
+        raise HTTPException(status_code=404, detail="Компания не найдена")
+    db_company, class_code = found
+    if not class_code:
+        raise HTTPException(status_code=404, detail="У компании нет основного кода ОКВЭД")
+
+    report = IndustryPercentileService.get_report(db, db_company.company_id, year)
+    if not report:
+        raise HTTPException(status_code=404, detail="Финансовые данные не найдены")
+
+    region = db_company.kod_re or ""
+    distributions = IndustryPercentileService.get_distributions(db, class_code, region, report.year)
+    values = IndustryPercentileService.metric_values(report)
+
+    return {
+        "inn": db_company.inn_norm,
+        "okved_class": class_code,
+        "region": region,
+        "year": report.year,
+        "values": values,
+        "region_percentiles": IndustryPercentileService.place_company(values, distributions.get(region, {})),
+        "russia_percentiles": IndustryPercentileService.place_company(values, distributions.get(ALL_REGIONS, {})),
+    }
+
+
+async def fetch_external_sources(
+        calls: Dict[str, Callable[[], Awaitable[Any]]]
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Одновременно запрашивает внешние источники с общим сроком settings.external_api_deadline.
+    Возвращает результаты по имени источника и список источников без данных
+    (не уложились в срок, завершились ошибкой, вернули None или ответ-ошибку вида {"error": ...})
+    """
+    tasks = {name: asyncio.ensure_future(call()) for name, call in calls.items()}
+    done, pending = await asyncio.wait(tasks.values(), timeout=settings.external_api_deadline)
+
+    for task in pending:
+        task.cancel()
+
+    results, missing = {}, []
+    for name, task in tasks.items():
+        if task in done and task.exception() is None and not is_failed_result(task.result()):
+            results[name] = task.result()
+        else:
+            if task in pending:
+                print(f"Источник {name} не ответил за {settings.external_api_deadline} с")
+            elif task.exception() is not None:
+                print(f"Ошибка источника {name}: {task.exception()}")
+            elif task.result() is not None:
+                print(f"Источник {name} вернул ошибку: {task.result().get('error', 'ошибка разбора ответа')}")
+            missing.append(name)
+
+    return results, missing
+
+
+def is_failed_result(result: Any) -> bool:
+    """Источник не дал данных: None или ответ-ошибка (RusProfileService отвечает {"error": ...} вместо None)"""
+    return result is None or (isinstance(result, dict) and RusProfileService.is_failed(result))
+
+
 def create_company_detail_from_db_and_api(db_company, counterparty_data, rusprofile_data, inn):
     """ИСПРАВЛЕННАЯ ФУНКЦИЯ: Создает детальную информацию о компании из данных БД и API"""
 
@@ -494,93 +762,52 @@ def extract_okved_from_api(company_info):
     return okved_data if okved_data else None
 
 
-def get_similar_companies_from_db(db: Session, okved: str, current_inn: str):
-    """ИСПРАВЛЕННАЯ ФУНКЦИЯ: Получает похожие компании из БД по ОКВЭД"""
+def get_similar_companies_from_db(db: Session, db_company, current_inn: str):
+    """
+    Похожие компании: ближайшие по финансовому профилю в том же классе ОКВЭД (similarity_index),
+    а если компании нет в индексе - компании с тем же кодом ОКВЭД
+    """
     similar_companies = []
 
-    if okved:
-        try:
+    try:
+        nearest = similarity_index.similar(db_company.company_id, settings.similar_limit)
+        if nearest:
+            db_similar = DatabaseService.get_companies_by_ids(db, [company_id for company_id, _ in nearest])
+        elif db_company.okved:
             # Получаем похожие компании из БД
-            db_similar = DatabaseService.get_similar_companies(db, okved, current_inn, 20)
-
-            for company in db_similar:
-                similar_company = CompanySearch(
-                    company_id=company.company_id,
-                    name=company.name,
-                    inn=company.inn,
-                    okved=company.okved,
-                    okved_o=company.okved_o,
-                    location=f"Код региона: {company.kod_re}" if company.kod_re else None
-                )
-                similar_companies.append(similar_company)
-
-            print(f"Найдено {len(similar_companies)} похожих компаний для ОКВЭД {okved}")
-
-        except Exception as e:
-            print(f"Ошибка получения похожих компаний: {e}")
-
-    return similar_companies
-
-
-def convert_api_finance_to_reports(finance_data):
-    """Преобразует данные из API в отчеты (ИСПРАВЛЕНИЕ: умножаем на 1000)"""
-    reports = []
-
-    balances = finance_data.get('balances', {})
-    fin_results = finance_data.get('fin_results', {})
-
-    balance_years = balances.get('years', [])
-    fin_years = fin_results.get('years', [])
-    all_years = sorted(set(balance_years + fin_years))
-
-    for year in all_years:
-        year_str = str(year)
-
-        # ИСПРАВЛЕНИЕ: Умножаем все финансовые данные на 1000 (так как они в тысячах)
-        report = FinancialReport(
-            year=year,
-            revenue_cur=multiply_by_thousand(get_fin_result_value(fin_results, '2110', year_str)),
-            gross_profit_cur=multiply_by_thousand(get_fin_result_value(fin_results, '2100', year_str)),
-            oper_profit_cur=multiply_by_thousand(get_fin_result_value(fin_results, '2200', year_str)),
-            net_profit_cur=multiply_by_thousand(get_fin_result_value(fin_results, '2400', year_str)),
-            balance_assets_eoy=multiply_by_thousand(get_balance_value(balances, '1600', year_str)),
-            equity_eoy=multiply_by_thousand(get_balance_value(balances, '1300', year_str))
-        )
-
-        reports.append(report)
-
-    return sorted(reports, key=lambda x: x.year)
+            db_similar = DatabaseService.get_similar_companies(
+                db, db_company.okved, current_inn, settings.similar_limit
+            )
+        else:
+            db_similar = []
 
+        for company in db_similar:
+            similar_company = CompanySearch(
+                company_id=company.company_id,
+                name=company.name,
+                inn=company.inn,
+                okved=company.okved,
+                okved_o=company.okved_o,
+                location=f"Код региона: {company.kod_re}" if company.kod_re else None
+            )
+            similar_companies.append(similar_company)
 
-def multiply_by_thousand(value):
-    """Умножает значение на 1000, обрабатывая None и 0"""
-    if value is None or value == 0:
-        return 0.0
-    return float(value) * 1000
+        print(f"Найдено {len(similar_companies)} похожих компаний "
+              f"({'по финансовому профилю' if nearest else f'по ОКВЭД {db_company.okved}'})")
 
+    except Exception as e:
+        print(f"Ошибка получения похожих компаний: {e}")
 
-def get_balance_value(balances, code, year):
-    """Получает значение из баланса"""
-    try:
-        indicators = balances.get('indicators', [])
-        for indicator in indicators:
-            if indicator.get('code') == code:
-                return indicator.get('sum', {}).get(year, 0.0) or 0.0
-        return 0.0
-    except:
-        return 0.0
+    return similar_companies
 
 
-def get_fin_result_value(fin_results, code, year):
-    """Получает значение из отчета о прибылях и убытках"""
+def find_company_id(inn: str) -> Optional[int]:
+    db = SessionLocal()
     try:
-        indicators = fin_results.get('indicators', [])
-        for indicator in indicators:
-            if indicator.get('code') == code:
-                return indicator.get('sum', {}).get(year, 0.0) or 0.0
-        return 0.0
-    except:
-        return 0.0
+        company = DatabaseService.get_company_by_inn(db, inn)
+        return company.company_id if company else None
+    finally:
+        db.close()
 
 
 def prepare_chart_data(reports):
@@ -0,0 +1,38 @@
+"""
+Пересчет распределений показателей по отраслям для /{inn}/percentiles.
+
+Для каждого класса основного ОКВЭД, региона и года (и для класса по всей
+России) считает перцентили 0..100 выручки, чистой прибыли, рентабельности,
+активов и капитала по таблице report и заменяет ими таблицу industry_percentile.
+Группы, где компаний меньше --min-companies, не сохраняются.
+
+Отчеты меняются редко, поэтому достаточно запуска раз в сутки (cron) и после загрузки данных.
+Запускать из каталога backend:
+
+    python -m app.cli.compute_percentiles --min-companies 10
+"""
+import argparse
+import time
+
+from app.core.database import SessionLocal
+from app.services.industry_percentile_service import IndustryPercentileService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-companies", type=int, default=10,
+                        help="Не сохранять распределения, в которых меньше стольких компаний")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        rows = IndustryPercentileService.rebuild(db, max(1, args.min_companies))
+    finally:
+        db.close()
+
+    print(f"Распределений сохранено: {rows} за {time.perf_counter() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Расчет предсказаний на следующий год для всех компаний с отчетами.
+
+Для каждой компании, у которой не меньше двух лет отчетов, считает предсказание
+(FinancialPredictionService.predict_batch, пачками по --batch-size компаний) и
+объяснение и записывает их в таблицу prediction с версией модели. Отчеты - из
+выгрузки (report, суммы переводятся в рубли), за годы с финансами DataNewton
+(api_report) - из api_report (report_service.load_prediction_reports); по тем же
+отчетам /{inn}/prediction считает предсказание сам, поэтому результаты совпадают.
+/{inn}/prediction отдает эти строки без обращения к DataNewton и пересчета.
+После полного прохода удаляются строки, которые не были пересчитаны
+(у компании больше нет двух лет отчетов).
+
+Отчеты меняются не чаще раза в год, поэтому запуск раз в сутки (cron) достаточен.
+Запускать из каталога backend:
+
+    python -m app.cli.compute_predictions --batch-size 10000
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+from typing import List
+
+import numpy as np
+
+from app.core.database import SessionLocal
+from app.schemas.company import PredictedFinancialData
+from app.services.database_service import DatabaseService
+from app.services.prediction_service import (
+    FinancialPredictionService, PREDICTED_METRICS, MODEL_VERSION, prediction_row, store_predictions
+)
+from app.services.report_service import load_prediction_reports
+
+
+def load_company_ids() -> List[int]:
+    db = SessionLocal()
+    try:
+        return DatabaseService.list_predictable_company_ids(db)
+    finally:
+        db.close()
+
+
+def compute_batch(company_ids: List[int], computed_at: datetime) -> int:
+    """Предсказания для пачки компаний; возвращает число записанных строк"""
+    companies_reports = load_prediction_reports(company_ids)
+    years, metrics, present = FinancialPredictionService.batch_arrays(companies_reports)
+    batch = FinancialPredictionService.predict_batch(years, metrics, present)
+
+    rows = []
+    for i, (company_id, reports) in enumerate(zip(company_ids, companies_reports)):
+        if not batch["valid"][i]:
+            continue
+        predicted_data = PredictedFinancialData(
+            year=int(batch["year"][i]),
+            confidence=float(batch["confidence"][i]),
+            **{metric: None if np.isnan(batch[metric][i]) else float(batch[metric][i])
+               for metric in PREDICTED_METRICS},
+        )
+        explanation = FinancialPredictionService.get_prediction_explanation(predicted_data, reports)
+        rows.append(prediction_row(company_id, predicted_data, explanation, reports, computed_at))
+
+    store_predictions(rows)
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=10000, help="Компаний в одной пачке")
+    args = parser.parse_args()
+
+    started_at = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    company_ids = load_company_ids()
+    print(f"Компаний с двумя и более годами отчетов: {len(company_ids)}, модель {MODEL_VERSION}")
+
+    saved = 0
+    batch_size = max(1, args.batch_size)
+    for i in range(0, len(company_ids), batch_size):
+        saved += compute_batch(company_ids[i:i + batch_size], started_at)
+        done = min(i + batch_size, len(company_ids))
+        elapsed = time.perf_counter() - started
+        print(f"{done}/{len(company_ids)}, записано предсказаний: {saved}, {done / elapsed:.0f} компаний/с")
+
+    db = SessionLocal()
+    try:
+        deleted = DatabaseService.delete_predictions_before(db, started_at)
+    finally:
+        db.close()
+
+    print(f"Готово за {time.perf_counter() - started:.1f} с: записано {saved}, удалено устаревших {deleted}")
+
+
+if __name__ == "__main__":
+    main()
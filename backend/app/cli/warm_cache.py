@@ -0,0 +1,265 @@
+"""
+Прогрев кэшей данных компаний перед массовым просмотром.
+
+Для каждого ИНН запрашивает основную информацию и финансы DataNewton и страницу
+RusProfile теми же сервисами, что и API, поэтому результаты попадают в те же кэши:
+api_cache, отчеты в api_report и страницы ОКВЭД в okved_page_cache. Свежие записи
+не запрашиваются заново (кроме --refresh).
+
+Запросы идут не больше чем --workers одновременно и не чаще --rate в секунду.
+Обработанные ИНН дописываются в --state; при повторном запуске с тем же файлом
+они пропускаются, поэтому прерванный прогрев можно продолжить. ИНН с ошибками
+в файл не попадают и будут запрошены снова.
+
+Запускать из каталога backend:
+
+    python -m app.cli.warm_cache --inn-file inns.txt --workers 8 --rate 5
+    python -m app.cli.warm_cache --okved 41.2 --region 77 --limit 20000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.http_client import close_http_client, start_http_client
+from app.core.parse_pool import parse_pool
+from app.services.api_cache_service import ApiCacheService
+from app.services.database_service import DatabaseService
+from app.services.datanewton_service import DataNewtonService
+from app.services.report_service import get_company_reports, load_stored_reports
+from app.services.rusprofile_service import RusProfileService
+
+SOURCES = ("counterparty", "finance", "rusprofile")
+# Размер пачки ИНН при поиске компаний в БД
+LOOKUP_BATCH = 5000
+
+
+class RateLimiter:
+    """Не больше rate вызовов wait() в секунду для всех воркеров вместе (0 - без ограничения)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+            self._next = max(now, self._next) + self.interval
+
+
+class Progress:
+    """Счетчики прогрева и периодический вывод хода работы"""
+
+    def __init__(self, total: int, interval: float):
+        self.total = total
+        self.interval = interval
+        self.started = time.perf_counter()
+        self._printed = self.started
+        self.done = 0
+        self.failed_inns = 0
+        self.by_status: Dict[str, int] = {"cached": 0, "fetched": 0, "failed": 0}
+
+    def add(self, statuses: Dict[str, str]) -> None:
+        self.done += 1
+        for status in statuses.values():
+            self.by_status[status] += 1
+        if "failed" in statuses.values():
+            self.failed_inns += 1
+
+        now = time.perf_counter()
+        if now - self._printed >= self.interval or self.done == self.total:
+            self._printed = now
+            print(self.line(now))
+
+    def line(self, now: float) -> str:
+        elapsed = now - self.started
+        rate = self.done / elapsed if elapsed else 0.0
+        left = (self.total - self.done) / rate if rate else 0.0
+        percent = self.done / self.total * 100 if self.total else 100.0
+        return (
+            f"{self.done}/{self.total} ({percent:.1f}%), {rate:.1f} ИНН/с, "
+            f"из кэша: {self.by_status['cached']}, запрошено: {self.by_status['fetched']}, "
+            f"ошибок: {self.by_status['failed']}, осталось ~{left / 60:.0f} мин"
+        )
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        fetched = self.by_status["fetched"]
+        return "\n".join([
+            f"Обработано ИНН: {self.done} из {self.total} за {elapsed:.1f} с "
+            f"({self.done / elapsed if elapsed else 0:.1f} ИНН/с)",
+            f"Источников из кэша: {self.by_status['cached']}, запрошено: {fetched} "
+            f"({fetched / elapsed if elapsed else 0:.1f} запросов/с), ошибок: {self.by_status['failed']}",
+            f"ИНН с ошибками (будут запрошены при следующем запуске): {self.failed_inns}",
+        ])
+
+
+def read_inn_file(path: Path) -> List[str]:
+    """ИНН из файла: по одному или через запятую/пробел в строке, # - комментарий"""
+    inns = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        for value in line.split("#", 1)[0].replace(",", " ").split():
+            inns.append(DatabaseService.normalize_inn(value))
+    return list(dict.fromkeys(inn for inn in inns if inn))
+
+
+def select_inns(okved: Optional[str], region: Optional[str], limit: Optional[int]) -> List[str]:
+    db = SessionLocal()
+    try:
+        return DatabaseService.list_company_inns(db, okved=okved, region=region, limit=limit)
+    finally:
+        db.close()
+
+
+def find_company_ids(inns: List[str]) -> Dict[str, int]:
+    """company_id по ИНН для компаний из БД (финансы остальных сохраняются только в api_cache)"""
+    db = SessionLocal()
+    try:
+        company_ids = {}
+        for i in range(0, len(inns), LOOKUP_BATCH):
+            companies = DatabaseService.get_companies_by_inns(db, inns[i:i + LOOKUP_BATCH])
+            company_ids.update({inn: company.company_id for inn, company in companies.items()})
+        return company_ids
+    finally:
+        db.close()
+
+
+def read_state(path: Optional[Path]) -> Set[str]:
+    if path is None or not path.exists():
+        return set()
+    return {line.strip() for line in path.read_text(encoding="utf-8").splitlines() if line.strip()}
+
+
+def is_warm(source: str, inn: str, company_id: Optional[int]) -> bool:
+    """Есть ли свежие данные источника, с которыми API не будет обращаться наружу"""
+    if source == "finance" and company_id is not None:
+        reports, fetched_at = load_stored_reports(company_id)
+        return bool(reports) and (datetime.now(timezone.utc) - fetched_at).total_seconds() < settings.report_max_age
+    return ApiCacheService.is_fresh(source, inn)
+
+
+async def warm_source(source: str, inn: str, company_id: Optional[int],
+                      limiter: RateLimiter, refresh: bool) -> str:
+    """cached - данные уже свежие, fetched - запрошены и сохранены, failed - ошибка"""
+    try:
+        if not refresh and await asyncio.to_thread(is_warm, source, inn, company_id):
+            return "cached"
+
+        # Несвежие данные запрашиваются мимо кэша: иначе устаревший ответ api_cache вернулся бы сразу,
+        # а запрос ушел бы фоновой задачей без ограничения частоты. Финансы компании с устаревшими
+        # отчетами api_report, но свежим ответом в api_cache, записываются из кэша без запроса
+        fetch_refresh = refresh or source != "finance" or company_id is None or \
+            not await asyncio.to_thread(ApiCacheService.is_fresh, source, inn)
+        if fetch_refresh:
+            await limiter.wait()
+        if source == "counterparty":
+            result = await DataNewtonService().get_counterparty(inn, refresh=True)
+        elif source == "finance":
+            result = await get_company_reports(company_id, inn, refresh=fetch_refresh)
+        else:
+            result = await RusProfileService().get_company_data(inn, refresh=True)
+            if result is not None and RusProfileService.is_failed(result):
+                result = None
+        return "fetched" if result is not None else "failed"
+    except Exception as e:
+        print(f"Ошибка прогрева {source} для {inn}: {e}")
+        return "failed"
+
+
+async def warm(inns: List[str], sources: Iterable[str], workers: int, rate: float,
+               state_path: Optional[Path], refresh: bool, progress: Progress) -> None:
+    company_ids = await asyncio.to_thread(find_company_ids, inns)
+    print(f"ИНН к прогреву: {len(inns)}, из них в базе: {len(company_ids)}")
+
+    limiter = RateLimiter(rate)
+    queue: asyncio.Queue = asyncio.Queue()
+    for inn in inns:
+        queue.put_nowait(inn)
+
+    state = state_path.open("a", encoding="utf-8") if state_path else None
+
+    async def worker():
+        while True:
+            try:
+                inn = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            company_id = company_ids.get(inn)
+            results = await asyncio.gather(*(
+                warm_source(source, inn, company_id, limiter, refresh) for source in sources
+            ))
+            statuses = dict(zip(sources, results))
+            if state and "failed" not in results:
+                state.write(inn + "\n")
+                state.flush()
+            progress.add(statuses)
+
+    await start_http_client()
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+    finally:
+        if state:
+            state.close()
+        await close_http_client()
+        parse_pool.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--inn-file", type=Path, help="Файл со списком ИНН")
+    parser.add_argument("--okved", help="Компании из БД с этим кодом ОКВЭД (41.2 - с подкодами, F - раздел)")
+    parser.add_argument("--region", help="Компании из БД с этим кодом региона")
+    parser.add_argument("--limit", type=int, help="Не больше стольких компаний из БД")
+    parser.add_argument("--sources", default=",".join(SOURCES),
+                        help=f"Источники через запятую (по умолчанию {','.join(SOURCES)})")
+    parser.add_argument("--workers", type=int, default=8, help="Одновременно обрабатываемых ИНН")
+    parser.add_argument("--rate", type=float, default=5.0, help="Запросов к внешним API в секунду (0 - без ограничения)")
+    parser.add_argument("--state", type=Path, default=Path("warm_cache.state"),
+                        help="Файл обработанных ИНН для продолжения после прерывания")
+    parser.add_argument("--refresh", action="store_true", help="Запросить заново и свежие данные")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="Как часто печатать ход работы, с")
+    args = parser.parse_args()
+
+    sources = [source.strip() for source in args.sources.split(",") if source.strip()]
+    unknown = set(sources) - set(SOURCES)
+    if unknown or not sources:
+        parser.error(f"Неизвестные источники: {', '.join(sorted(unknown)) or '(пусто)'}")
+
+    if args.inn_file:
+        inns = read_inn_file(args.inn_file)
+    elif args.okved or args.region or args.limit:
+        inns = select_inns(args.okved, args.region, args.limit)
+    else:
+        parser.error("Укажите --inn-file или фильтр компаний (--okved, --region, --limit)")
+
+    processed = read_state(args.state)
+    pending = [inn for inn in inns if inn not in processed]
+    if len(pending) < len(inns):
+        print(f"Пропущено уже обработанных ИНН: {len(inns) - len(pending)} (файл {args.state})")
+    if not pending:
+        print("Нечего прогревать")
+        return
+
+    progress = Progress(len(pending), args.progress_interval)
+    try:
+        asyncio.run(warm(pending, sources, args.workers, args.rate, args.state, args.refresh, progress))
+    except KeyboardInterrupt:
+        print(progress.summary())
+        print("Прервано; при повторном запуске обработанные ИНН будут пропущены", file=sys.stderr)
+        sys.exit(130)
+
+    print(progress.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+# backend/app/core/admin.py
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.core.config import settings
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None, description="Токен администратора")) -> None:
+    """Доступ к служебным методам: заголовок X-Admin-Token должен совпадать с settings.admin_token.
+
+    Пока токен не задан, служебные методы отключены.
+    """
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Служебные методы отключены: не задан ADMIN_TOKEN")
+    if not x_admin_token or not secrets.compare_digest(
+            x_admin_token.encode("utf-8"), settings.admin_token.encode("utf-8")
+    ):
+        raise HTTPException(status_code=401, detail="Неверный токен администратора")
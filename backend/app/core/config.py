@@ -25,6 +25,64 @@ class Settings(BaseSettings):
     rusprofile_base_url: str = "https://www.rusprofile.ru"
     datanewton_base_url: str = "https://api.datanewton.ru"
 
+    # Общий HTTP клиент внешних API: пул соединений и таймауты (секунды)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_connect_timeout: float = 5.0
+    http_timeout: float = 30.0
+    datanewton_timeout: float = 30.0
+    rusprofile_timeout: float = 30.0
+    # Общий срок на одновременные запросы к внешним API в одном обращении к аналитике
+    external_api_deadline: float = 15.0
+    # Разбор HTML RusProfile в отдельных процессах: число процессов и сколько
+    # задач может ждать в очереди сверх них (остальные ждут в event loop)
+    parse_pool_size: int = 2
+    parse_pool_max_queue: int = 32
+
+    # Кэш ответов DataNewton и RusProfile в таблице api_cache: срок свежести по методам (секунды);
+    # устаревшие записи моложе api_cache_max_age отдаются сразу и обновляются в фоне
+    api_cache_ttl_counterparty: int = 7 * 24 * 3600
+    api_cache_ttl_finance: int = 30 * 24 * 3600
+    api_cache_ttl_rusprofile: int = 7 * 24 * 3600
+    api_cache_ttl_default: int = 24 * 3600
+    api_cache_max_age: int = 365 * 24 * 3600
+    # Финансы из DataNewton сохраняются в report; отчеты старше этого срока
+    # (секунды) запрашиваются заново при следующем просмотре компании
+    report_max_age: int = 30 * 24 * 3600
+    # Разобранные страницы кодов ОКВЭД RusProfile: одна страница на всю отрасль,
+    # хранятся в таблице okved_page_cache и в памяти процесса (число страниц, секунды)
+    okved_page_cache_size: int = 4096
+    okved_page_cache_ttl: int = 30 * 24 * 3600
+
+    # Поиск: способ подсчета total по умолчанию (exact, estimate, capped),
+    # предел для capped и кэш точных подсчетов
+    search_total_mode: str = "exact"
+    search_count_cap: int = 1000
+    search_count_cache_size: int = 1024
+    search_count_cache_ttl: int = 300
+    # Кэш готовых страниц результатов поиска
+    search_result_cache_size: int = 2048
+    search_result_cache_ttl: int = 120
+    # Как часто проверять таблицу data_load (перезагрузка данных сбрасывает кэши), секунд
+    data_version_check_interval: int = 30
+
+    # Подсказки при вводе: индекс в памяти процесса, строится при запуске
+    # и дополняется новыми компаниями раз в suggest_refresh_interval секунд
+    suggest_enabled: bool = True
+    suggest_refresh_interval: int = 300
+    suggest_key_length: int = 32
+
+    # Похожие компании: индекс финансовых профилей по классам ОКВЭД в памяти процесса,
+    # строится при запуске и дополняется новыми отчетами раз в similar_refresh_interval секунд
+    similar_enabled: bool = True
+    similar_refresh_interval: int = 300
+    similar_limit: int = 20
+
+    # Токен служебных методов API (принудительное обновление данных, удаление кэшей),
+    # передается в заголовке X-Admin-Token; пустой - методы отключены
+    admin_token: str = ""
+
     # App settings
     app_name: str = "Company Analytics API"
     debug: bool = True
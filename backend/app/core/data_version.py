@@ -0,0 +1,81 @@
+import logging
+import threading
+from typing import Callable, List, Optional
+
+from sqlalchemy import func
+
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class DataVersionWatcher:
+    """Следит за таблицей data_load и сообщает подписчикам о перезагрузке данных.
+
+    Версия данных - последний load_id; его меняет скрипт миграции после загрузки.
+    Подписчики (кэши, индекс подсказок) сбрасывают то, что построено по старым данным.
+    """
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        # Версия прочитана хотя бы раз (None - таблица data_load пуста)
+        self._known = False
+        self._callbacks: List[Callable[[], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def on_change(self, callback: Callable[[], None]) -> None:
+        self._callbacks.append(callback)
+
+    @staticmethod
+    def current_version() -> Optional[int]:
+        from app.models.data_load import DataLoad
+
+        db = SessionLocal()
+        try:
+            return db.query(func.max(DataLoad.load_id)).scalar()
+        finally:
+            db.close()
+
+    def check(self) -> bool:
+        """Проверяет версию данных; при изменении вызывает подписчиков. True - данные сменились"""
+        version = self.current_version()
+        changed = self._known and version != self.version
+        self.version = version
+        self._known = True
+        if not changed:
+            return False
+
+        logger.info(f"Данные перезагружены (версия {version}), сбрасываем кэши")
+        for callback in self._callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Ошибка обработки перезагрузки данных: {e}")
+        return True
+
+    def _run(self, interval: int):
+        while not self._stop.wait(interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Ошибка проверки версии данных: {e}")
+
+    def start(self, interval: int):
+        """Запоминает текущую версию и проверяет ее раз в interval секунд в фоновом потоке"""
+        if self._thread and self._thread.is_alive():
+            return
+        try:
+            self.version = self.current_version()
+            self._known = True
+        except Exception as e:
+            logger.error(f"Ошибка чтения версии данных: {e}")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="data-version", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+data_version = DataVersionWatcher()
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -19,10 +19,183 @@ Base = declarative_base()
 
 def create_tables():
     """Создание таблиц"""
-    from app.models import company, report
+    from app.models import (
+        company, report, api_report, company_okved, company_facet, data_load, api_cache, okved_page_cache,
+        prediction, industry_percentile,
+    )
     Base.metadata.create_all(bind=engine)
 
 
+# Расширения и индексы PostgreSQL, которые нельзя описать через модели
+POSTGRES_DDL = [
+    # Триграммный индекс для поиска по словам в названии (ILIKE '%слово%')
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_company_name_trgm ON company USING gin (name gin_trgm_ops)",
+    # Полнотекстовый поиск с ранжированием (для таблиц, созданных до появления колонки)
+    "ALTER TABLE company ADD COLUMN IF NOT EXISTS name_tsv tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('russian', coalesce(name, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS idx_company_name_tsv ON company USING gin (name_tsv)",
+    # Постраничная выдача по курсору: сортировка и переход к странице по (coalesce(name, ''), company_id)
+    "CREATE INDEX IF NOT EXISTS idx_company_name_key ON company ((coalesce(name, '')), company_id)",
+    "DROP INDEX IF EXISTS idx_company_name_id",
+    # Нормализованный ИНН (заполняется migrate_to_postgres.py, в старых базах - backfill_inn_norm)
+    "ALTER TABLE company ADD COLUMN IF NOT EXISTS inn_norm VARCHAR(20)",
+    "ALTER TABLE company ADD COLUMN IF NOT EXISTS inn_artifact BOOLEAN NOT NULL DEFAULT false",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_company_inn_norm ON company (inn_norm)",
+    # Последние отчеты для пакетного запроса по списку ИНН
+    "CREATE INDEX IF NOT EXISTS idx_report_company_year ON report (company_id, year)",
+]
+
+
+# Заполнение inn_norm и inn_artifact (как backfill_inn_norm в migrate_to_postgres.py):
+# из строк с одинаковым ИНН нормализованный получает настоящая строка, а не артефакт '.0'
+INN_NORM_BACKFILL = [
+    "UPDATE company SET inn_norm = NULL, inn_artifact = btrim(inn) LIKE '%.0'",
+    """
+    UPDATE company AS c
+    SET inn_norm = chosen.norm
+    FROM (
+        SELECT DISTINCT ON (norm) company_id, norm
+        FROM (
+            SELECT company_id, inn_artifact, regexp_replace(btrim(inn), '\\.0$', '') AS norm
+            FROM company
+        ) AS normalized
+        ORDER BY norm, inn_artifact, company_id
+    ) AS chosen
+    WHERE c.company_id = chosen.company_id
+    """,
+]
+
+
+def backfill_inn_norm():
+    """Заполняет inn_norm в базе, загруженной до появления колонки.
+
+    Поиск компании по ИНН идет только по inn_norm: без заполнения все /{inn} отвечали бы 404.
+    Если inn_norm есть хотя бы у одной компании, колонка уже заполнена при загрузке.
+    """
+    with engine.begin() as conn:
+        filled = conn.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM company WHERE inn_norm IS NOT NULL) "
+            "OR NOT EXISTS (SELECT 1 FROM company)"
+        )).scalar()
+        if filled:
+            return
+        for statement in INN_NORM_BACKFILL:
+            conn.execute(text(statement))
+    print("Нормализованный ИНН заполнен для компаний, загруженных до появления колонки inn_norm")
+
+
+# Разбор кодов ОКВЭД в company_okved и фасеты (как build_okved_index и refresh_facet_counts
+# в migrate_to_postgres.py)
+OKVED_CODE_PATTERN = r'(?<![\d.])\d{2}(?:\.\d{1,2}){0,2}(?!\.?\d)'
+
+# Раздел ОКВЭД по номеру класса
+OKVED_SECTION_SQL = """
+    CASE
+        WHEN cls BETWEEN 1 AND 3 THEN 'A'
+        WHEN cls BETWEEN 5 AND 9 THEN 'B'
+        WHEN cls BETWEEN 10 AND 33 THEN 'C'
+        WHEN cls = 35 THEN 'D'
+        WHEN cls BETWEEN 36 AND 39 THEN 'E'
+        WHEN cls BETWEEN 41 AND 43 THEN 'F'
+        WHEN cls BETWEEN 45 AND 47 THEN 'G'
+        WHEN cls BETWEEN 49 AND 53 THEN 'H'
+        WHEN cls BETWEEN 55 AND 56 THEN 'I'
+        WHEN cls BETWEEN 58 AND 63 THEN 'J'
+        WHEN cls BETWEEN 64 AND 66 THEN 'K'
+        WHEN cls = 68 THEN 'L'
+        WHEN cls BETWEEN 69 AND 75 THEN 'M'
+        WHEN cls BETWEEN 77 AND 82 THEN 'N'
+        WHEN cls = 84 THEN 'O'
+        WHEN cls = 85 THEN 'P'
+        WHEN cls BETWEEN 86 AND 88 THEN 'Q'
+        WHEN cls BETWEEN 90 AND 93 THEN 'R'
+        WHEN cls BETWEEN 94 AND 96 THEN 'S'
+        WHEN cls BETWEEN 97 AND 98 THEN 'T'
+        WHEN cls = 99 THEN 'U'
+    END
+"""
+
+OKVED_INDEX_BACKFILL = [
+    f"""
+    INSERT INTO company_okved (company_id, code, is_primary, section, class_code, subclass_code)
+    SELECT DISTINCT
+        codes.company_id,
+        codes.code,
+        codes.is_primary,
+        {OKVED_SECTION_SQL},
+        left(codes.code, 2),
+        CASE WHEN length(codes.code) >= 4 THEN left(codes.code, 4) END
+    FROM (
+        SELECT company_id, (regexp_matches(okved, :pattern, 'g'))[1] AS code, TRUE AS is_primary
+        FROM company
+        UNION ALL
+        SELECT company_id, (regexp_matches(okved_o, :pattern, 'g'))[1], FALSE
+        FROM company
+    ) AS codes
+    CROSS JOIN LATERAL (SELECT left(codes.code, 2)::int AS cls) AS class_number
+    """,
+    "DELETE FROM company_facet",
+    """
+    INSERT INTO company_facet (kod_re, section, company_count)
+    SELECT coalesce(c.kod_re, ''), coalesce(p.section, ''), COUNT(*)
+    FROM company AS c
+    LEFT JOIN LATERAL (
+        SELECT section
+        FROM company_okved
+        WHERE company_okved.company_id = c.company_id AND company_okved.is_primary
+        ORDER BY code
+        LIMIT 1
+    ) AS p ON TRUE
+    WHERE NOT c.inn_artifact
+    GROUP BY 1, 2
+    """,
+]
+
+
+def backfill_okved_index():
+    """Заполняет company_okved и company_facet в базе, загруженной до появления таблиц.
+
+    Поиск и фильтр по ОКВЭД, похожие компании, фасеты и отраслевые перцентили читают
+    только company_okved: пустая таблица при заполненной company значит, что разбор
+    кодов при загрузке не выполнялся.
+    """
+    with engine.begin() as conn:
+        filled = conn.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM company_okved) "
+            "OR NOT EXISTS (SELECT 1 FROM company WHERE okved IS NOT NULL OR okved_o IS NOT NULL)"
+        )).scalar()
+        if filled:
+            return
+        for statement in OKVED_INDEX_BACKFILL:
+            conn.execute(text(statement), {"pattern": OKVED_CODE_PATTERN})
+        conn.execute(text("ANALYZE company_okved"))
+    print("Коды ОКВЭД разобраны в company_okved для компаний, загруженных до появления таблицы")
+
+
+def create_indexes():
+    """Создание расширений и специальных индексов PostgreSQL"""
+    if engine.dialect.name != "postgresql":
+        return
+
+    for statement in POSTGRES_DDL:
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(statement))
+        except Exception as e:
+            print(f"Ошибка выполнения '{statement}': {e}")
+
+    try:
+        backfill_inn_norm()
+    except Exception as e:
+        print(f"Ошибка заполнения inn_norm: {e}")
+
+    try:
+        backfill_okved_index()
+    except Exception as e:
+        print(f"Ошибка разбора кодов ОКВЭД: {e}")
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -34,4 +207,5 @@ def get_db():
 def init_database():
     """Инициализация базы данных"""
     create_tables()
+    create_indexes()
     print("База данных инициализирована")
\ No newline at end of file
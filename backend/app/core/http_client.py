@@ -0,0 +1,51 @@
+import logging
+from typing import Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Общий клиент внешних API: пул соединений и keep-alive на весь процесс
+_client: Optional[httpx.AsyncClient] = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout),
+        follow_redirects=True,
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Общий клиент; создается при запуске приложения (или при первом обращении в скриптах)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+
+def request_timeout(seconds: float) -> httpx.Timeout:
+    """Таймаут отдельного запроса с общим таймаутом на подключение"""
+    return httpx.Timeout(seconds, connect=min(seconds, settings.http_connect_timeout))
+
+
+async def start_http_client() -> None:
+    get_http_client()
+    logger.info(
+        f"HTTP клиент создан: до {settings.http_max_connections} соединений, "
+        f"keep-alive {settings.http_max_keepalive_connections}"
+    )
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
\ No newline at end of file
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _timed_call(func: Callable[..., Any], args: Tuple) -> Tuple[Any, float]:
+    """Выполняется в процессе пула: результат и время работы функции (секунды)"""
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+class ParsePool:
+    """Пул процессов для разбора HTML, чтобы разбор не блокировал event loop.
+
+    В процесс передается исходный HTML, обратно возвращается обычный dict, поэтому
+    функции разбора должны быть функциями модуля (их передает pickle). Одновременно
+    в пуле не больше size + max_queue задач, остальные вызовы ждут своей очереди.
+    """
+
+    def __init__(self, size: int, max_queue: int, history: int = 1000):
+        self.size = max(1, size)
+        self.max_queue = max(0, max_queue)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        # Задачи, отправленные в пул, и вызовы, ждущие места в пуле
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self._parse_times: Deque[float] = deque(maxlen=history)
+        self._wait_times: Deque[float] = deque(maxlen=history)
+
+    def start(self) -> None:
+        if self._executor is None:
+            # spawn: процессы не наследуют потоки и соединения родителя
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.size, mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Пул разбора HTML: {self.size} процессов, очередь до {self.max_queue}")
+
+    def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Выполняет func(*args) в процессе пула и возвращает результат"""
+        self.start()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size + self.max_queue)
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self._executor, _timed_call, func, args)
+            result, parse_time = await future
+        except BrokenProcessPool:
+            # Процесс пула аварийно завершился: следующий вызов создаст новый пул
+            logger.error("Пул разбора HTML сломан, пересоздаем")
+            self.failed += 1
+            self.stop()
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+        self.completed += 1
+        self._parse_times.append(parse_time)
+        self._wait_times.append(time.perf_counter() - queued_at - parse_time)
+        return result
+
+    @property
+    def queue_depth(self) -> int:
+        """Задачи, которые ждут свободного процесса (в очереди пула и перед ней)"""
+        return max(0, self.in_flight - self.size) + self.waiting
+
+    @staticmethod
+    def _percentiles_ms(values: Deque[float]) -> Dict[str, float]:
+        if not values:
+            return {"p50_ms": 0.0, "p99_ms": 0.0}
+        p50, p99 = np.percentile(np.fromiter(values, dtype=float), [50, 99]) * 1000
+        return {"p50_ms": round(float(p50), 2), "p99_ms": round(float(p99), 2)}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.size,
+            "running": min(self.in_flight, self.size),
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            # Время разбора в процессе пула и ожидание (очередь и передача данных)
+            "parse_time": self._percentiles_ms(self._parse_times),
+            "wait_time": self._percentiles_ms(self._wait_times),
+        }
+
+
+parse_pool = ParsePool(settings.parse_pool_size, settings.parse_pool_max_queue)
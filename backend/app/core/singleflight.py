@@ -0,0 +1,41 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Объединение одинаковых одновременных вызовов: пока вызов по ключу выполняется,
+    остальные запросы с тем же ключом ждут его результат, а не запускают свой.
+
+    Общий вызов защищен asyncio.shield: отмена одного из ожидающих (например, по сроку
+    ответа) не отменяет вызов для остальных.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.started += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Исключение уже получили ожидающие; если их не осталось, не пишем "never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._calls), "started": self.started, "shared": self.shared}
+
+
+# Обращения к внешним API (DataNewton, RusProfile) по (источник, ИНН)
+external_calls = SingleFlight()
\ No newline at end of file
@@ -4,6 +4,15 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.endpoints import companies
 from app.core.config import settings
 from app.core.database import init_database
+from app.core.data_version import data_version
+from app.core.http_client import start_http_client, close_http_client
+from app.core.parse_pool import parse_pool
+from app.core.singleflight import external_calls
+from app.services.database_service import DatabaseService
+from app.services.api_cache_service import ApiCacheService
+from app.services.okved_page_cache_service import OkvedPageCacheService
+from app.services.suggest_service import suggest_index
+from app.services.similarity_service import similarity_index
 
 app = FastAPI(
     title="Company Analytics API",
@@ -15,6 +24,27 @@ app = FastAPI(
 @app.on_event("startup")
 async def startup_event():
     init_database()
+    # Общий пул соединений к DataNewton и RusProfile
+    await start_http_client()
+    # Процессы для разбора HTML RusProfile
+    parse_pool.start()
+    # Индекс подсказок строится в фоне, /suggest отвечает 503, пока он не готов
+    if settings.suggest_enabled:
+        suggest_index.start(settings.suggest_refresh_interval)
+    # Индекс похожих компаний по финансовому профилю; пока он строится - похожие по коду ОКВЭД
+    if settings.similar_enabled:
+        similarity_index.start(settings.similar_refresh_interval)
+    # Перезагрузка данных (новая запись в data_load) сбрасывает кэши и индекс подсказок
+    data_version.start(settings.data_version_check_interval)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    suggest_index.stop()
+    similarity_index.stop()
+    data_version.stop()
+    await close_http_client()
+    parse_pool.stop()
 
 # CORS middleware
 app.add_middleware(
@@ -34,4 +64,18 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "version": "2.0"}
\ No newline at end of file
+    return {"status": "healthy", "version": "2.0"}
+
+@app.get("/metrics")
+async def metrics():
+    """Счетчики кэшей, пула разбора HTML и состояние индексов подсказок и похожих компаний"""
+    return {
+        "caches": DatabaseService.cache_stats(),
+        "api_cache": ApiCacheService.stats(),
+        "okved_pages": OkvedPageCacheService.stats(),
+        "external_calls": external_calls.stats(),
+        "parse_pool": parse_pool.stats(),
+        "suggest_index": {"ready": suggest_index.ready, "companies": len(suggest_index)},
+        "similarity_index": similarity_index.stats(),
+        "data_version": data_version.version,
+    }
\ No newline at end of file
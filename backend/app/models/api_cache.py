@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from app.core.database import Base
+
+
+class ApiCache(Base):
+    """Сохраненные ответы внешних API (DataNewton, RusProfile) по (метод, ИНН)"""
+    __tablename__ = "api_cache"
+
+    endpoint = Column(String(50), primary_key=True)  # counterparty, finance, rusprofile
+    inn = Column(String(20), primary_key=True)
+    payload = Column(JSONB, nullable=False)
+    fetched_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("idx_api_cache_inn", "inn"),
+    )
\ No newline at end of file
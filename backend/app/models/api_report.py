@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from app.core.database import Base
+from app.models.report import ReportFields
+
+
+class ApiReport(ReportFields, Base):
+    """Финансы компании из DataNewton, записанные при просмотре компании (суммы в рублях).
+
+    Хранятся отдельно от отчетов выгрузки (report): у источников разные единицы измерения,
+    и выборки по report их не смешивают.
+    """
+    __tablename__ = "api_report"
+
+    company_id = Column(Integer, ForeignKey("company.company_id", ondelete="CASCADE"), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    fetched_at = Column(DateTime(timezone=True), nullable=False)
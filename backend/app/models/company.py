@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Boolean, Computed, Index, false
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from app.core.database import Base
 
 
@@ -13,5 +14,21 @@ class Company(Base):
     okved_o = Column(String)
     kod_re = Column(String)  # Код региона
 
+    # ИНН без артефакта ".0" (значения, прошедшие через float при выгрузке);
+    # заполняется при загрузке данных, поиск по ИНН - одно обращение к уникальному индексу
+    inn_norm = Column(String(20))
+    # Строка-артефакт: ИНН заканчивается на ".0" (исключается из поиска)
+    inn_artifact = Column(Boolean, nullable=False, default=False, server_default=false())
+
+    # Полнотекстовый вектор названия (конфигурация russian), вычисляется в PostgreSQL
+    name_tsv = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('russian', coalesce(name, ''))", persisted=True)
+    ))
+
     # Связь с отчетами
-    reports = relationship("Report", back_populates="company")
\ No newline at end of file
+    reports = relationship("Report", back_populates="company")
+
+    __table_args__ = (
+        Index("idx_company_inn_norm", "inn_norm", unique=True),
+    )
\ No newline at end of file
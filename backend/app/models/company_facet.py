@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+from app.core.database import Base
+
+
+class CompanyFacet(Base):
+    """Число компаний по региону и разделу основного ОКВЭД; пересчитывается при загрузке данных"""
+    __tablename__ = "company_facet"
+
+    kod_re = Column(String, primary_key=True)  # Код региона ( - не указан)
+    section = Column(String(1), primary_key=True)  # Раздел основного ОКВЭД ( - не указан)
+    company_count = Column(Integer, nullable=False)
\ No newline at end of file
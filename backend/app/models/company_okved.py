@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index
+from app.core.database import Base
+
+
+class CompanyOkved(Base):
+    """Коды ОКВЭД компании, разобранные из company.okved / company.okved_o при загрузке данных"""
+    __tablename__ = "company_okved"
+
+    company_id = Column(Integer, ForeignKey("company.company_id"), primary_key=True)
+    code = Column(String(20), primary_key=True)  # Например, 41.20.1
+    is_primary = Column(Boolean, primary_key=True)  # Основной вид деятельности
+
+    # Уровни классификатора
+    section = Column(String(1))  # Раздел (F)
+    class_code = Column(String(2))  # Класс (41)
+    subclass_code = Column(String(4))  # Подкласс (41.2)
+
+    __table_args__ = (
+        # Поиск по началу кода (LIKE '41.2%') - диапазонное сканирование индекса
+        Index("idx_company_okved_code", "code", postgresql_ops={"code": "text_pattern_ops"}),
+        Index("idx_company_okved_section", "section"),
+        Index("idx_company_okved_class", "class_code"),
+    )
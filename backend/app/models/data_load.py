@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, DateTime, func
+from app.core.database import Base
+
+
+class DataLoad(Base):
+    """Отметка о загрузке данных: новая строка - данные company / report перезагружены"""
+    __tablename__ = "data_load"
+
+    load_id = Column(Integer, primary_key=True)
+    loaded_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    source = Column(String(100))  # Кто загрузил данные (например, migrate_to_postgres)
\ No newline at end of file
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy.dialects.postgresql import ARRAY
+from app.core.database import Base
+
+
+class IndustryPercentile(Base):
+    """Распределение показателя по компаниям класса ОКВЭД в регионе за год (app.cli.compute_percentiles)"""
+    __tablename__ = "industry_percentile"
+
+    class_code = Column(String(2), primary_key=True)  # Класс основного ОКВЭД (41)
+    kod_re = Column(String, primary_key=True)  # Код региона ( - не указан, * - все регионы)
+    year = Column(Integer, primary_key=True)
+    metric = Column(String(20), primary_key=True)  # revenue, net_profit, margin, assets, equity
+
+    company_count = Column(Integer, nullable=False)
+    # Значения перцентилей 0, 1, ..., 100 (percentile_cont)
+    percentiles = Column(ARRAY(Float), nullable=False)
+    computed_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from app.core.database import Base
+
+
+class OkvedPageCache(Base):
+    """Разобранные страницы кодов ОКВЭД RusProfile по URL (общие для всех компаний отрасли)"""
+    __tablename__ = "okved_page_cache"
+
+    url = Column(String(500), primary_key=True)
+    payload = Column(JSONB, nullable=False)
+    fetched_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
+from app.core.database import Base
+
+
+class Prediction(Base):
+    """Предсказание показателей компании на следующий год, рассчитанное заранее (app.cli.compute_predictions)"""
+    __tablename__ = "prediction"
+
+    company_id = Column(Integer, ForeignKey("company.company_id", ondelete="CASCADE"), primary_key=True)
+    # Версия модели предсказания: строки других версий не отдаются и пересчитываются
+    model_version = Column(String(50), nullable=False)
+
+    year = Column(Integer, nullable=False)
+    revenue_cur = Column(Float)
+    net_profit_cur = Column(Float)
+    balance_assets_eoy = Column(Float)
+    equity_eoy = Column(Float)
+    confidence = Column(Float)
+    explanation = Column(JSONB, nullable=False)
+
+    # Сколько лет отчетов использовано и последний из них
+    base_data_years = Column(Integer, nullable=False)
+    last_year = Column(Integer, nullable=False)
+    computed_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,14 +1,10 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey
+from sqlalchemy import Column, Integer, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 
-class Report(Base):
-    __tablename__ = "report"
-
-    report_id = Column(Integer, primary_key=True, index=True)
-    company_id = Column(Integer, ForeignKey("company.company_id"), nullable=False)
-    year = Column(Integer, nullable=False)
+class ReportFields:
+    """Показатели отчета: общие колонки report (выгрузка) и api_report (DataNewton)"""
 
     # Актив
     intangible_assets_eoy = Column(Float)
@@ -46,5 +42,18 @@ class Report(Base):
     net_profit_cur = Column(Float)
     net_profit_prev = Column(Float)
 
+
+class Report(ReportFields, Base):
+    """Отчеты из выгрузки (migrate_to_postgres.py)"""
+    __tablename__ = "report"
+    __table_args__ = (
+        # Последний отчет компании: DISTINCT ON (company_id) ... ORDER BY year DESC
+        Index("idx_report_company_year", "company_id", "year"),
+    )
+
+    report_id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("company.company_id"), nullable=False)
+    year = Column(Integer, nullable=False)
+
     # Relationship with company
     company = relationship("Company", back_populates="reports")
\ No newline at end of file
@@ -19,6 +19,12 @@ class CompanySearch(CompanyBase):
         str_strip_whitespace = True
 
 
+class BatchLookupRequest(BaseModel):
+    """Пакетный запрос компаний по списку ИНН (портфель контрагентов)"""
+    inns: List[str] = Field(..., min_length=1, max_length=5000, description="Список ИНН")
+    include_reports: bool = Field(False, description="Добавить последний финансовый отчет из БД")
+
+
 class CompanyDetail(BaseModel):
     # Основная информация из БД
     company_id: int
@@ -50,12 +56,42 @@ class CompanyDetail(BaseModel):
 
 class FinancialReport(BaseModel):
     year: int
+
+    # Актив
+    intangible_assets_eoy: Optional[float] = None
+    intangible_assets_poy: Optional[float] = None
+    curr_assets_eoy: Optional[float] = None
+    curr_assets_poy: Optional[float] = None
+    balance_assets_eoy: Optional[float] = None
+    balance_assets_poy: Optional[float] = None
+
+    # Капитал и результаты
+    retained_earnings_eoy: Optional[float] = None
+    retained_earnings_poy: Optional[float] = None
+    equity_eoy: Optional[float] = None
+    equity_poy: Optional[float] = None
+
+    # Обязательства
+    lt_liabilities_eoy: Optional[float] = None
+    lt_liabilities_poy: Optional[float] = None
+    st_liabilities_eoy: Optional[float] = None
+    st_liabilities_poy: Optional[float] = None
+    balance_liab_eoy: Optional[float] = None
+    balance_liab_poy: Optional[float] = None
+
+    # Отчет о фин. результатах
     revenue_cur: Optional[float] = None
+    revenue_prev: Optional[float] = None
     gross_profit_cur: Optional[float] = None
+    gross_profit_prev: Optional[float] = None
     oper_profit_cur: Optional[float] = None
+    oper_profit_prev: Optional[float] = None
+    pbt_cur: Optional[float] = None
+    pbt_prev: Optional[float] = None
+    income_tax_cur: Optional[float] = None
+    income_tax_prev: Optional[float] = None
     net_profit_cur: Optional[float] = None
-    balance_assets_eoy: Optional[float] = None
-    equity_eoy: Optional[float] = None
+    net_profit_prev: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -80,4 +116,6 @@ class CompanyAnalytics(BaseModel):
     chart_data: Dict[str, Any]
     similar_companies: List[CompanySearch]
     # НОВОЕ: Добавляем предсказанные данные
-    predicted_data: Optional[PredictedFinancialData] = None
\ No newline at end of file
+    predicted_data: Optional[PredictedFinancialData] = None
+    # Внешние источники, не ответившие за отведенное время (counterparty, finance, rusprofile)
+    missing_sources: List[str] = []
\ No newline at end of file
@@ -1,7 +1,18 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Literal, Dict
 from app.schemas.company import CompanySearch
 
+# Режим поиска по названию:
+# words  - все слова как целые слова, сортировка по названию
+# ranked - полнотекстовый поиск (russian) с сортировкой по релевантности ts_rank
+SearchMode = Literal["words", "ranked"]
+
+# Способ подсчета total:
+# exact    - точный COUNT(*) (кэшируется по набору фильтров)
+# estimate - оценка планировщика PostgreSQL (EXPLAIN), без выполнения запроса
+# capped   - точное число, но не больше search_count_cap ("не меньше N")
+SearchTotalMode = Literal["exact", "estimate", "capped"]
+
 class SearchParams(BaseModel):
     inn: Optional[str] = Field(None, description="ИНН компании")
     name: Optional[str] = Field(None, description="Название компании (регистронезависимый поиск)")
@@ -14,4 +25,19 @@ class SearchParams(BaseModel):
 
 class SearchResponse(BaseModel):
     companies: List[CompanySearch]
-    total: int
\ No newline at end of file
+    total: int
+    # False, если total - оценка или нижняя граница
+    total_exact: bool = True
+    # Курсор следующей страницы (None - это последняя страница)
+    next_cursor: Optional[str] = None
+    # Число найденных компаний по региону и разделу основного ОКВЭД (при facets=true)
+    facets: Optional[Dict[str, Dict[str, int]]] = None
+
+class CompanySuggestion(BaseModel):
+    company_id: int
+    name: str
+    inn: str
+
+
+class SuggestResponse(BaseModel):
+    items: List[CompanySuggestion]
\ No newline at end of file
@@ -0,0 +1,139 @@
+# backend/app/services/api_cache_service.py
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.api_cache import ApiCache
+
+logger = logging.getLogger(__name__)
+
+# Фоновые обновления устаревших записей: ссылки на задачи и ключи, которые уже обновляются
+_background_tasks: Set[asyncio.Task] = set()
+_refreshing: Set[Tuple[str, str]] = set()
+
+
+class ApiCacheService:
+    """Кэш ответов внешних API (DataNewton, RusProfile) в таблице api_cache.
+
+    Свежая запись (моложе TTL метода) отдается сразу. Устаревшая, но не старше
+    api_cache_max_age, тоже отдается сразу, а в фоне запрашивается новая версия
+    (stale-while-revalidate). Без записи - обычный запрос к API с сохранением ответа.
+    """
+
+    @staticmethod
+    def ttl(endpoint: str) -> int:
+        """Срок свежести ответа метода API, секунд"""
+        return {
+            "counterparty": settings.api_cache_ttl_counterparty,
+            "finance": settings.api_cache_ttl_finance,
+            "rusprofile": settings.api_cache_ttl_rusprofile,
+        }.get(endpoint, settings.api_cache_ttl_default)
+
+    @staticmethod
+    def load(endpoint: str, inn: str) -> Optional[Tuple[Any, datetime]]:
+        """Сохраненный ответ и время его получения"""
+        db = SessionLocal()
+        try:
+            entry = db.get(ApiCache, (endpoint, inn))
+            return (entry.payload, entry.fetched_at) if entry else None
+        finally:
+            db.close()
+
+    @staticmethod
+    def is_fresh(endpoint: str, inn: str) -> bool:
+        """Есть ли сохраненный ответ моложе срока свежести метода"""
+        cached = ApiCacheService.load(endpoint, inn)
+        if cached is None:
+            return False
+        return (datetime.now(timezone.utc) - cached[1]).total_seconds() < ApiCacheService.ttl(endpoint)
+
+    @staticmethod
+    def store(endpoint: str, inn: str, payload: Any) -> None:
+        db = SessionLocal()
+        try:
+            statement = insert(ApiCache).values(
+                endpoint=endpoint, inn=inn, payload=payload, fetched_at=datetime.now(timezone.utc)
+            )
+            db.execute(statement.on_conflict_do_update(
+                index_elements=[ApiCache.endpoint, ApiCache.inn],
+                set_={"payload": statement.excluded.payload, "fetched_at": statement.excluded.fetched_at},
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def purge(inn: Optional[str] = None, endpoint: Optional[str] = None) -> int:
+        """Удаляет записи (по ИНН и/или методу; без фильтров - все). Возвращает число удаленных"""
+        db = SessionLocal()
+        try:
+            query = db.query(ApiCache)
+            if inn:
+                query = query.filter(ApiCache.inn == inn)
+            if endpoint:
+                query = query.filter(ApiCache.endpoint == endpoint)
+            deleted = query.delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+    @staticmethod
+    async def fetch(endpoint: str, inn: str, call: Callable[[], Awaitable[Optional[Any]]],
+                    refresh: bool = False) -> Optional[Any]:
+        """Ответ метода API из кэша или из API (refresh - всегда из API)"""
+        if not refresh:
+            try:
+                cached = await asyncio.to_thread(ApiCacheService.load, endpoint, inn)
+            except Exception as e:
+                logger.error(f"Ошибка чтения api_cache ({endpoint}, {inn}): {e}")
+                cached = None
+
+            if cached is not None:
+                payload, fetched_at = cached
+                age = (datetime.now(timezone.utc) - fetched_at).total_seconds()
+                if age < ApiCacheService.ttl(endpoint):
+                    return payload
+                if age < settings.api_cache_max_age:
+                    ApiCacheService._refresh_in_background(endpoint, inn, call)
+                    return payload
+
+        return await ApiCacheService._call_and_store(endpoint, inn, call)
+
+    @staticmethod
+    async def _call_and_store(endpoint: str, inn: str,
+                              call: Callable[[], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        payload = await call()
+        # Ошибки API (None) не сохраняем: в кэше остается прежний ответ
+        if payload is not None:
+            try:
+                await asyncio.to_thread(ApiCacheService.store, endpoint, inn, payload)
+            except Exception as e:
+                logger.error(f"Ошибка записи api_cache ({endpoint}, {inn}): {e}")
+        return payload
+
+    @staticmethod
+    def _refresh_in_background(endpoint: str, inn: str, call: Callable[[], Awaitable[Optional[Any]]]) -> None:
+        key = (endpoint, inn)
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+        async def refresh():
+            try:
+                await ApiCacheService._call_and_store(endpoint, inn, call)
+            finally:
+                _refreshing.discard(key)
+
+        task = asyncio.create_task(refresh())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    @staticmethod
+    def stats() -> Dict[str, int]:
+        return {"background_refreshes": len(_refreshing)}
@@ -1,18 +1,345 @@
 # backend/app/services/database_service.py
+import re
+import json
+import base64
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_, and_, not_, text
-from typing import List, Optional, Tuple, Dict, Any
+from sqlalchemy import func, or_, and_, not_, text, tuple_, cast, Float, select, false, any_, literal, String, Integer, union
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple, Dict, Any, NamedTuple
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.data_version import data_version
 from app.models.company import Company
+from app.models.company_okved import CompanyOkved
+from app.models.company_facet import CompanyFacet
 from app.models.report import Report
+from app.models.api_report import ApiReport
+from app.models.prediction import Prediction
+
+
+# Поля отчета, которые приходят из финансов DataNewton (convert_api_finance_to_reports) и хранятся в api_report
+API_REPORT_FIELDS = (
+    "intangible_assets_eoy", "intangible_assets_poy", "curr_assets_eoy", "curr_assets_poy",
+    "balance_assets_eoy", "balance_assets_poy",
+    "retained_earnings_eoy", "retained_earnings_poy", "equity_eoy", "equity_poy",
+    "lt_liabilities_eoy", "lt_liabilities_poy", "st_liabilities_eoy", "st_liabilities_poy",
+    "balance_liab_eoy", "balance_liab_poy",
+    "revenue_cur", "revenue_prev", "gross_profit_cur", "gross_profit_prev",
+    "oper_profit_cur", "oper_profit_prev", "pbt_cur", "pbt_prev",
+    "income_tax_cur", "income_tax_prev", "net_profit_cur", "net_profit_prev",
+)
+
+
+class CompanyRow(NamedTuple):
+    """Компания в результатах поиска: поля, нужные выдаче, без привязки к сессии БД"""
+    company_id: int
+    name: str
+    inn: str
+    okved: Optional[str]
+    okved_o: Optional[str]
+    kod_re: Optional[str]
+
+
+class SearchPage(NamedTuple):
+    """Страница результатов поиска"""
+    companies: List[CompanyRow]
+    total: int
+    next_cursor: Optional[str] = None
+    total_exact: bool = True
+    # Число найденных компаний по значениям фасетов: {"region": {...}, "okved_section": {...}}
+    facets: Optional[Dict[str, Dict[str, int]]] = None
+
+
+class InvalidCursorError(ValueError):
+    """Курсор постраничной выдачи поврежден или не подходит к запросу"""
+
+
+# Ключи сортировки (выражение, по убыванию) для постраничной выдачи по названию;
+# пустое название сортируется как '': сравнение кортежа с NULL не дало бы следующей страницы
+NAME_SORT_KEYS = [(func.coalesce(Company.name, ''), False), (Company.company_id, False)]
+
+# Код ОКВЭД или его начало: класс (41), подкласс (41.2), группа (41.20), подгруппа и вид
+OKVED_CODE_RE = re.compile(r"(?<![\d.])\d{2}(?:\.\d{1,2}){0,2}(?!\.?\d)")
+# Раздел ОКВЭД (A-U)
+OKVED_SECTION_RE = re.compile(r"[A-U]")
+
+# Фильтры, для которых фасеты берутся из заранее посчитанной таблицы company_facet
+FACET_PRECOMPUTED_FILTERS = {'region'}
+
+# Точные значения total и фасеты по нормализованному набору фильтров
+_count_cache = TTLCache(settings.search_count_cache_size, settings.search_count_cache_ttl)
+_facet_cache = TTLCache(settings.search_count_cache_size, settings.search_count_cache_ttl)
+# Готовые страницы результатов: фильтры + режим, лимит, курсор, способ подсчета
+_result_cache = TTLCache(settings.search_result_cache_size, settings.search_result_cache_ttl)
 
 
 class DatabaseService:
 
     @staticmethod
-    def search_companies_flexible(db: Session, params: Dict[str, str], limit: int = 100) -> Tuple[List[Company], int]:
+    def cache_stats() -> Dict[str, Dict[str, Any]]:
+        """Счетчики кэшей поиска"""
+        return {
+            "search_results": _result_cache.stats(),
+            "search_counts": _count_cache.stats(),
+            "search_facets": _facet_cache.stats(),
+        }
+
+    @staticmethod
+    def clear_caches() -> None:
+        """Сброс кэшей поиска (после перезагрузки данных)"""
+        _result_cache.clear()
+        _count_cache.clear()
+        _facet_cache.clear()
+
+    @staticmethod
+    def _company_rows(companies: List[Company]) -> List[CompanyRow]:
+        return [
+            CompanyRow(c.company_id, c.name, c.inn, c.okved, c.okved_o, c.kod_re)
+            for c in companies
+        ]
+
+    @staticmethod
+    def encode_cursor(mode: str, values: list) -> str:
+        """Непрозрачный курсор: значения ключей сортировки последней строки страницы"""
+        payload = json.dumps({"m": mode, "k": values}, ensure_ascii=False, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[str, list]:
+        """Разбирает курсор в (режим, значения ключей сортировки)"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+            mode, values = payload["m"], payload["k"]
+        except Exception:
+            raise InvalidCursorError("Некорректный курсор")
+
+        if not isinstance(values, list):
+            raise InvalidCursorError("Некорректный курсор")
+        return mode, values
+
+    @staticmethod
+    def _keyset_condition(sort_keys: list, values: list):
+        """Условие "строго после курсора" для сортировки sort_keys.
+
+        Хвост ключей по возрастанию сравнивается одним кортежем
+        (coalesce(name, ''), company_id) > (...), поэтому PostgreSQL переходит
+        к следующей странице сразу по индексу idx_company_name_key, без OFFSET.
+        """
+        split = len(sort_keys)
+        while split > 0 and not sort_keys[split - 1][1]:
+            split -= 1
+
+        ascending = [expr for expr, _ in sort_keys[split:]]
+        condition = tuple_(*ascending) > tuple_(*values[split:])
+
+        for (expr, descending), value in reversed(list(zip(sort_keys[:split], values[:split]))):
+            beyond = expr < value if descending else expr > value
+            condition = or_(beyond, and_(expr == value, condition))
+
+        return condition
+
+    @staticmethod
+    def _fetch_page(query, sort_keys: list, limit: int, mode: str,
+                    cursor: Optional[str] = None) -> Tuple[List[Company], Optional[str]]:
+        """Выбирает страницу по ключам сортировки и формирует курсор следующей страницы"""
+        key_columns = [expr.label(f"sort_key_{i}") for i, (expr, _) in enumerate(sort_keys)]
+        page_query = query.add_columns(*key_columns)
+
+        if cursor:
+            cursor_mode, after = DatabaseService.decode_cursor(cursor)
+            if cursor_mode != mode or len(after) != len(sort_keys):
+                raise InvalidCursorError("Курсор выдан для другого режима поиска")
+            page_query = page_query.filter(DatabaseService._keyset_condition(sort_keys, after))
+
+        order_by = [expr.desc() if descending else expr for expr, descending in sort_keys]
+        rows = page_query.order_by(*order_by).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = DatabaseService.encode_cursor(mode, list(rows[-1][1:]))
+
+        return [row[0] for row in rows], next_cursor
+
+    @staticmethod
+    def _filters_key(params: Dict[str, str], mode: str = "words") -> tuple:
+        """Нормализованный набор фильтров: пробелы обрезаны, верхний регистр, слова названия отсортированы"""
+        key = []
+        for field, value in params.items():
+            value = (value or '').strip().upper()
+            if not value:
+                continue
+            if field == 'name':
+                value = ' '.join(sorted(set(value.split())))
+                key.append(('mode', mode))
+            key.append((field, value))
+        return tuple(sorted(key))
+
+    @staticmethod
+    def _estimate_count(db: Session, query) -> int:
+        """Оценка числа строк по плану запроса (EXPLAIN); сам запрос не выполняется"""
+        compiled = query.statement.compile(dialect=db.get_bind().dialect)
+        plan = db.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    @staticmethod
+    def _count_total(db: Session, query, total_mode: str, filters_key: tuple) -> Tuple[int, bool]:
+        """Общее количество найденных компаний и признак того, что оно точное"""
+        cached = _count_cache.get(filters_key)
+        if cached is not None:
+            return cached, True
+
+        if total_mode == "estimate":
+            return DatabaseService._estimate_count(db, query), False
+
+        if total_mode == "capped":
+            # Считаем не больше cap + 1 строк: ответ "не меньше cap" вместо полного подсчета
+            cap = settings.search_count_cap
+            total = db.query(func.count()).select_from(query.limit(cap + 1).subquery()).scalar()
+            if total > cap:
+                return cap, False
+        else:
+            total = query.count()
+
+        _count_cache.set(filters_key, total)
+        return total, True
+
+    @staticmethod
+    def _group_facets(db: Session, region, section, count) -> Dict[str, Dict[str, int]]:
+        """Один запрос GROUP BY GROUPING SETS ((регион), (раздел)) по подготовленным колонкам"""
+        rows = db.query(
+            func.grouping(region), region, section, count
+        ).group_by(func.grouping_sets(region, section)).all()
+
+        facets = {"region": {}, "okved_section": {}}
+        for by_section, region_value, section_value, company_count in rows:
+            facet, value = ("okved_section", section_value) if by_section else ("region", region_value)
+            # Компании без региона / основного ОКВЭД в фасеты не попадают
+            if value and company_count:
+                facets[facet][value] = int(company_count)
+        return facets
+
+    @staticmethod
+    def _search_facets(db: Session, query, params: Dict[str, str], filters_key: tuple) -> Dict[str, Dict[str, int]]:
+        """Фасеты по региону и разделу основного ОКВЭД для набора найденных компаний"""
+        cached = _facet_cache.get(filters_key)
+        if cached is not None:
+            return cached
+
+        facets = None
+        used_filters = {field for field, value in params.items() if value and value.strip()}
+        if used_filters <= FACET_PRECOMPUTED_FILTERS:
+            # Широкие фильтры: суммы по company_facet вместо группировки всей таблицы company
+            precomputed = db.query(CompanyFacet.kod_re, CompanyFacet.section, CompanyFacet.company_count)
+            if params.get('region'):
+                precomputed = precomputed.filter(CompanyFacet.kod_re.like(f"%{params['region']}%"))
+            rows = precomputed.subquery()
+            facets = DatabaseService._group_facets(
+                db, rows.c.kod_re, rows.c.section, func.sum(rows.c.company_count)
+            )
+            # Пустая таблица - данные еще не пересчитаны, считаем по company
+            if not facets["region"] and not facets["okved_section"]:
+                facets = None
+
+        if facets is None:
+            primary_section = select(CompanyOkved.section).where(
+                CompanyOkved.company_id == Company.company_id,
+                CompanyOkved.is_primary
+            ).order_by(CompanyOkved.code).limit(1).scalar_subquery()
+            rows = query.with_entities(
+                Company.kod_re.label("kod_re"), primary_section.label("section")
+            ).subquery()
+            facets = DatabaseService._group_facets(db, rows.c.kod_re, rows.c.section, func.count())
+
+        _facet_cache.set(filters_key, facets)
+        return facets
+
+    @staticmethod
+    def _okved_condition(okved_value: str):
+        """Фильтр компаний по коду ОКВЭД с учетом иерархии классификатора.
+
+        Код ищется в таблице company_okved по началу (41.2 -> 41.2, 41.20, 41.20.1, ...)
+        среди основных и дополнительных кодов; раздел (F) - по колонке section.
+        """
+        value = okved_value.strip().upper().replace(',', '.')
+
+        if OKVED_SECTION_RE.fullmatch(value):
+            codes = select(CompanyOkved.company_id).where(CompanyOkved.section == value)
+        elif OKVED_CODE_RE.fullmatch(value):
+            codes = select(CompanyOkved.company_id).where(CompanyOkved.code.like(f"{value}%"))
+        else:
+            return false()
+
+        return Company.company_id.in_(codes)
+
+    @staticmethod
+    def _name_word_conditions(name_value: str, column=Company.name) -> list:
+        """Условия поиска каждого слова запроса как целого слова в названии.
+
+        Для каждого слова сначала идет ILIKE '%слово%', который PostgreSQL
+        выполняет по триграммному индексу idx_company_name_trgm, и только на
+        отобранных строках проверяется граница слова регулярным выражением.
+        """
+        search_words = [word.strip() for word in name_value.split() if word.strip()]
+
+        conditions = []
+        for word in search_words:
+            word_upper = word.upper()
+            like_value = word_upper.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            conditions.append(column.ilike(f"%{like_value}%", escape='\\'))
+            # \y - граница слова в PostgreSQL, ~* - регистронезависимый поиск
+            conditions.append(column.op('~*')(f"\\y{re.escape(word_upper)}\\y"))
+
+        return conditions
+
+    @staticmethod
+    def _name_ts_query(name_value: str):
+        """tsquery (russian) из слов запроса: каждое слово ищется как префикс лексемы"""
+        search_words = re.findall(r"[^\W_]+", name_value)
+        if not search_words:
+            return None
+        return func.to_tsquery('russian', ' & '.join(f"{word}:*" for word in search_words))
+
+    @staticmethod
+    def _name_search(name_value: str, mode: str = "words") -> Tuple[list, list]:
+        """Условия и сортировка для поиска по названию в выбранном режиме.
+
+        В режиме ranked отбор идет по GIN-индексу idx_company_name_tsv, а сортировка
+        по ts_rank выполняется в PostgreSQL, так что из БД уходят только первые limit строк.
+        """
+        if mode == "ranked":
+            ts_query = DatabaseService._name_ts_query(name_value)
+            if ts_query is None:
+                return [], []
+            return (
+                [Company.name_tsv.op('@@')(ts_query)],
+                # ts_rank возвращает real; double precision без потерь переживает курсор
+                [(cast(func.ts_rank(Company.name_tsv, ts_query), Float), True)] + NAME_SORT_KEYS
+            )
+
+        return DatabaseService._name_word_conditions(name_value), NAME_SORT_KEYS
+
+    @staticmethod
+    def search_companies_flexible(db: Session, params: Dict[str, str], limit: int = 100,
+                                  mode: str = "words", cursor: Optional[str] = None,
+                                  total_mode: Optional[str] = None, facets: bool = False) -> SearchPage:
         """Гибкий поиск компаний в БД"""
+        cache_key = ('search', DatabaseService._filters_key(params, mode), limit, cursor,
+                     total_mode or settings.search_total_mode, facets)
+        cached = _result_cache.get(cache_key)
+        if cached is not None:
+            print(f"Результат поиска из кэша: {cache_key[1]}")
+            return cached
+
         query = db.query(Company)
         filters = []
+        sort_keys = NAME_SORT_KEYS
 
         # Поиск по ИНН
         if 'inn' in params and params['inn']:
@@ -20,7 +347,7 @@ class DatabaseService:
             print(f"Поиск по ИНН: {inn_value}")
             filters.append(
                 or_(
-                    Company.inn == inn_value,
+                    Company.inn_norm == DatabaseService.normalize_inn(inn_value),
                     Company.inn.like(f"%{inn_value}%")
                 )
             )
@@ -28,35 +355,19 @@ class DatabaseService:
         # ✅ ИСПРАВЛЕНО: Поиск по названию с учетом границ слов
         if 'name' in params and params['name']:
             name_value = params['name'].strip()
-            print(f"Поиск по названию: {name_value}")
-            
-            # Разбиваем поисковый запрос на отдельные слова
-            search_words = [word.strip() for word in name_value.split() if word.strip()]
-            
-            if search_words:
-                # Создаем условия для поиска каждого слова как целого слова
-                word_conditions = []
-                for word in search_words:
-                    # Используем регулярные выражения PostgreSQL для поиска целых слов
-                    # \y - граница слова в PostgreSQL
-                    word_pattern = f"\\y{word.upper()}\\y"
-                    word_conditions.append(
-                        Company.name.op('~*')(word_pattern)  # ~* - регистронезависимый поиск по регулярному выражению
-                    )
-                
+            print(f"Поиск по названию: {name_value} (режим: {mode})")
+
+            name_conditions, name_sort_keys = DatabaseService._name_search(name_value, mode)
+            if name_conditions:
                 # Все слова должны присутствовать в названии (AND)
-                filters.append(and_(*word_conditions))
+                filters.append(and_(*name_conditions))
+                sort_keys = name_sort_keys
 
         # Поиск по ОКВЭД
         if 'okved' in params and params['okved']:
             okved_value = params['okved']
             print(f"Поиск по ОКВЭД: {okved_value}")
-            filters.append(
-                or_(
-                    Company.okved.like(f"%{okved_value}%"),
-                    Company.okved_o.like(f"%{okved_value}%")
-                )
-            )
+            filters.append(DatabaseService._okved_condition(okved_value))
 
         # Поиск по региону
         if 'region' in params and params['region']:
@@ -69,106 +380,147 @@ class DatabaseService:
             query = query.filter(and_(*filters))
         else:
             print("Нет параметров для поиска")
-            return [], 0
+            return SearchPage([], 0)
 
         # Исключаем организации с ИНН, заканчивающимся на .0
-        query = query.filter(not_(Company.inn.like('%.0')))
+        query = query.filter(not_(Company.inn_artifact))
 
         # Подсчет общего количества
+        total_exact = True
+        # В кэш результатов попадают только страницы, собранные без ошибок
+        complete = True
         try:
-            total = query.count()
-            print(f"Найдено записей всего: {total}")
+            total, total_exact = DatabaseService._count_total(
+                db, query, total_mode or settings.search_total_mode,
+                DatabaseService._filters_key(params, mode)
+            )
+            print(f"Найдено записей всего: {total}{'' if total_exact else ' (не точно)'}")
         except Exception as e:
             print(f"Ошибка подсчета: {e}")
             total = 0
+            complete = False
+
+        # Фасеты по региону и разделу ОКВЭД
+        facet_counts = None
+        if facets:
+            try:
+                facet_counts = DatabaseService._search_facets(
+                    db, query, params, DatabaseService._filters_key(params, mode)
+                )
+            except Exception as e:
+                print(f"Ошибка подсчета фасетов: {e}")
+                complete = False
 
-        # Получение результатов с ограничением
+        # Получение страницы результатов с ограничением
+        next_cursor = None
         try:
-            companies = query.order_by(Company.name).limit(limit).all()
+            page_mode = "words" if sort_keys is NAME_SORT_KEYS else mode
+            companies, next_cursor = DatabaseService._fetch_page(query, sort_keys, limit, page_mode, cursor)
             print(f"Возвращаем {len(companies)} записей (лимит: {limit})")
 
             if companies:
                 print(f"Первые результаты: {[f'{c.name} (ИНН: {c.inn})' for c in companies[:3]]}")
 
+        except InvalidCursorError:
+            raise
         except Exception as e:
             print(f"Ошибка получения результатов: {e}")
             companies = []
+            complete = False
 
-        return companies, total
+        page = SearchPage(DatabaseService._company_rows(companies), total, next_cursor, total_exact, facet_counts)
+        if complete:
+            _result_cache.set(cache_key, page)
+        return page
 
     @staticmethod
-    def search_by_name(db: Session, name: str, limit: int = 100) -> Tuple[List[Company], int]:
-        """Поиск компаний по названию с учетом границ слов"""
+    def search_by_name(db: Session, name: str, limit: int = 100,
+                       mode: str = "words", cursor: Optional[str] = None,
+                       total_mode: Optional[str] = None) -> SearchPage:
+        """Поиск компаний по названию с учетом границ слов или с ранжированием"""
+        cache_key = ('by-name', DatabaseService._filters_key({'name': name}, mode), limit, cursor,
+                     total_mode or settings.search_total_mode)
+        cached = _result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
             # ✅ ИСПРАВЛЕНО: Используем поиск по целым словам
-            name_value = name.strip()
-            search_words = [word.strip() for word in name_value.split() if word.strip()]
-            
-            if not search_words:
-                return [], 0
-            
+            name_conditions, sort_keys = DatabaseService._name_search(name.strip(), mode)
+            if not name_conditions:
+                return SearchPage([], 0)
+
             query = db.query(Company)
-            
-            # Создаем условия для поиска каждого слова как целого слова
-            word_conditions = []
-            for word in search_words:
-                # Используем регулярные выражения PostgreSQL для поиска целых слов
-                word_pattern = f"\\y{word.upper()}\\y"
-                word_conditions.append(
-                    Company.name.op('~*')(word_pattern)
-                )
-            
+
             # Все слова должны присутствовать в названии
-            query = query.filter(and_(*word_conditions))
+            query = query.filter(and_(*name_conditions))
 
             # Исключаем организации с ИНН, заканчивающимся на .0
-            query = query.filter(not_(Company.inn.like('%.0')))
+            query = query.filter(not_(Company.inn_artifact))
 
-            total = query.count()
-            companies = query.order_by(Company.name).limit(limit).all()
+            total, total_exact = DatabaseService._count_total(
+                db, query, total_mode or settings.search_total_mode,
+                DatabaseService._filters_key({'name': name}, mode)
+            )
+            companies, next_cursor = DatabaseService._fetch_page(query, sort_keys, limit, mode, cursor)
 
             print(f"Поиск по названию '{name}': найдено {total}, возвращено {len(companies)}")
-            return companies, total
+            page = SearchPage(DatabaseService._company_rows(companies), total, next_cursor, total_exact)
+            _result_cache.set(cache_key, page)
+            return page
 
+        except InvalidCursorError:
+            raise
         except Exception as e:
             print(f"Ошибка поиска по названию: {e}")
-            return [], 0
+            return SearchPage([], 0)
 
     @staticmethod
-    def search_by_okved(db: Session, okved: str, limit: int = 100) -> Tuple[List[Company], int]:
+    def search_by_okved(db: Session, okved: str, limit: int = 100,
+                        cursor: Optional[str] = None, total_mode: Optional[str] = None) -> SearchPage:
         """Поиск компаний по ОКВЭД"""
+        cache_key = ('by-okved', DatabaseService._filters_key({'okved': okved}), limit, cursor,
+                     total_mode or settings.search_total_mode)
+        cached = _result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
-            query = db.query(Company).filter(
-                or_(
-                    Company.okved.like(f"%{okved}%"),
-                    Company.okved_o.like(f"%{okved}%")
-                )
-            )
+            query = db.query(Company).filter(DatabaseService._okved_condition(okved))
 
             # НОВОЕ: Исключаем организации с ИНН, заканчивающимся на .0
-            query = query.filter(not_(Company.inn.like('%.0')))
+            query = query.filter(not_(Company.inn_artifact))
 
-            total = query.count()
-            companies = query.order_by(Company.name).limit(limit).all()
+            total, total_exact = DatabaseService._count_total(
+                db, query, total_mode or settings.search_total_mode,
+                DatabaseService._filters_key({'okved': okved})
+            )
+            companies, next_cursor = DatabaseService._fetch_page(query, NAME_SORT_KEYS, limit, "words", cursor)
 
             print(f"Поиск по ОКВЭД '{okved}': найдено {total}, возвращено {len(companies)}")
-            return companies, total
+            page = SearchPage(DatabaseService._company_rows(companies), total, next_cursor, total_exact)
+            _result_cache.set(cache_key, page)
+            return page
 
+        except InvalidCursorError:
+            raise
         except Exception as e:
             print(f"Ошибка поиска по ОКВЭД: {e}")
-            return [], 0
+            return SearchPage([], 0)
 
     @staticmethod
-    def get_company_by_inn(db: Session, inn: str) -> Optional[Company]:
-        """Получить компанию по ИНН"""
+    def normalize_inn(inn: str) -> str:
+        """ИНН без пробелов и артефакта '.0' - так он хранится в company.inn_norm"""
         inn_clean = inn.strip()
-        company = db.query(Company).filter(
-            or_(
-                Company.inn == inn_clean,
-                Company.inn == f"{inn_clean}.0",
-                func.replace(Company.inn, '.0', '') == inn_clean
-            )
-        ).first()
+        if inn_clean.endswith('.0'):
+            inn_clean = inn_clean[:-2]
+        return inn_clean
+
+    @staticmethod
+    def get_company_by_inn(db: Session, inn: str) -> Optional[Company]:
+        """Получить компанию по ИНН (одно обращение к уникальному индексу idx_company_inn_norm)"""
+        inn_clean = DatabaseService.normalize_inn(inn)
+        company = db.query(Company).filter(Company.inn_norm == inn_clean).first()
 
         print(f"Поиск компании по ИНН {inn_clean}: {'найдена' if company else 'не найдена'}")
         if company:
@@ -176,6 +528,47 @@ class DatabaseService:
 
         return company
 
+    @staticmethod
+    def get_companies_by_inns(db: Session, inns: List[str]) -> Dict[str, Company]:
+        """Компании по списку ИНН одним запросом (inn_norm = ANY(...)), ключ - нормализованный ИНН"""
+        inns_clean = list(dict.fromkeys(DatabaseService.normalize_inn(inn) for inn in inns))
+        if not inns_clean:
+            return {}
+
+        companies = db.query(Company).filter(
+            Company.inn_norm == any_(literal(inns_clean, ARRAY(String)))
+        ).all()
+
+        print(f"Пакетный поиск по {len(inns_clean)} ИНН: найдено {len(companies)} компаний")
+
+        return {company.inn_norm: company for company in companies}
+
+    @staticmethod
+    def list_company_inns(db: Session, okved: Optional[str] = None, region: Optional[str] = None,
+                          limit: Optional[int] = None) -> List[str]:
+        """Нормализованные ИНН компаний по фильтру (ОКВЭД с учетом иерархии, код региона)"""
+        query = db.query(Company.inn_norm).filter(Company.inn_norm.isnot(None))
+        if okved:
+            query = query.filter(DatabaseService._okved_condition(okved))
+        if region:
+            query = query.filter(Company.kod_re == region.strip())
+        query = query.order_by(Company.company_id)
+        if limit:
+            query = query.limit(limit)
+        return [row.inn_norm for row in query]
+
+    @staticmethod
+    def get_latest_reports(db: Session, company_ids: List[int]) -> Dict[int, Report]:
+        """Последний по году отчет каждой компании из списка одним запросом"""
+        if not company_ids:
+            return {}
+
+        reports = db.query(Report).filter(
+            Report.company_id == any_(literal(list(company_ids), ARRAY(Integer)))
+        ).distinct(Report.company_id).order_by(Report.company_id, Report.year.desc()).all()
+
+        return {report.company_id: report for report in reports}
+
     @staticmethod
     def get_reports_from_db(db: Session, company_id: int) -> List[Report]:
         """Получить отчеты компании из БД"""
@@ -189,24 +582,141 @@ class DatabaseService:
 
         return reports
 
+    @staticmethod
+    def get_api_reports(db: Session, company_id: int) -> List[ApiReport]:
+        """Отчеты компании, записанные из DataNewton (таблица api_report), по возрастанию года"""
+        return db.query(ApiReport).filter(
+            ApiReport.company_id == company_id
+        ).order_by(ApiReport.year).all()
+
+    @staticmethod
+    def save_api_reports(db: Session, company_id: int, reports: List[Any], fetched_at: datetime) -> None:
+        """
+        Записывает отчеты из DataNewton в api_report: новые годы добавляются, существующие обновляются.
+        fetched_at - время получения ответа DataNewton, по которому построены отчеты
+        """
+        if not reports:
+            return
+
+        rows = [
+            {
+                "company_id": company_id,
+                "year": report.year,
+                "fetched_at": fetched_at,
+                **{field: getattr(report, field) for field in API_REPORT_FIELDS},
+            }
+            for report in reports
+        ]
+        statement = insert(ApiReport).values(rows)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[ApiReport.company_id, ApiReport.year],
+            set_={field: statement.excluded[field] for field in API_REPORT_FIELDS + ("fetched_at",)},
+        ))
+        # Предсказание по прежним отчетам больше не действительно
+        db.query(Prediction).filter(Prediction.company_id == company_id).delete(synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def get_company_with_prediction(db: Session, inn: str,
+                                    model_version: str) -> Tuple[Optional[Company], Optional[Prediction]]:
+        """Компания по ИНН и ее сохраненное предсказание этой версии модели одним запросом"""
+        inn_clean = DatabaseService.normalize_inn(inn)
+        row = db.query(Company, Prediction).outerjoin(
+            Prediction, and_(Prediction.company_id == Company.company_id, Prediction.model_version == model_version)
+        ).filter(Company.inn_norm == inn_clean).first()
+        return (row[0], row[1]) if row else (None, None)
+
+    @staticmethod
+    def list_predictable_company_ids(db: Session) -> List[int]:
+        """company_id компаний, у которых в report и api_report вместе не меньше двух лет отчетов"""
+        years = union(
+            select(Report.company_id, Report.year), select(ApiReport.company_id, ApiReport.year)
+        ).subquery()
+        rows = db.query(years.c.company_id).group_by(years.c.company_id).having(
+            func.count() >= 2
+        ).order_by(years.c.company_id)
+        return [row.company_id for row in rows]
+
+    @staticmethod
+    def get_reports_by_company(db: Session, company_ids: List[int]) -> Dict[int, List[Report]]:
+        """Отчеты выгрузки компаний из списка одним запросом, у каждой - по возрастанию года"""
+        reports = db.query(Report).filter(
+            Report.company_id == any_(literal(list(company_ids), ARRAY(Integer)))
+        ).order_by(Report.company_id, Report.year, Report.report_id).all()
+
+        result: Dict[int, List[Report]] = {}
+        for report in reports:
+            result.setdefault(report.company_id, []).append(report)
+        return result
+
+    @staticmethod
+    def get_api_reports_by_company(db: Session, company_ids: List[int]) -> Dict[int, List[ApiReport]]:
+        """Отчеты api_report компаний из списка одним запросом, у каждой - по возрастанию года"""
+        reports = db.query(ApiReport).filter(
+            ApiReport.company_id == any_(literal(list(company_ids), ARRAY(Integer)))
+        ).order_by(ApiReport.company_id, ApiReport.year).all()
+
+        result: Dict[int, List[ApiReport]] = {}
+        for report in reports:
+            result.setdefault(report.company_id, []).append(report)
+        return result
+
+    @staticmethod
+    def save_predictions(db: Session, rows: List[Dict[str, Any]]) -> None:
+        """Записывает предсказания (строки таблицы prediction), заменяя прежние"""
+        if not rows:
+            return
+        statement = insert(Prediction).values(rows)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[Prediction.company_id],
+            set_={column: statement.excluded[column] for column in rows[0] if column != "company_id"},
+        ))
+        db.commit()
+
+    @staticmethod
+    def delete_predictions_before(db: Session, computed_before: datetime) -> int:
+        """Удаляет предсказания, рассчитанные раньше указанного времени (не пересчитанные последним запуском)"""
+        deleted = db.query(Prediction).filter(
+            Prediction.computed_at < computed_before
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+    @staticmethod
+    def get_companies_by_ids(db: Session, company_ids: List[int]) -> List[Company]:
+        """Компании по списку company_id одним запросом, в порядке списка"""
+        if not company_ids:
+            return []
+        companies = db.query(Company).filter(
+            Company.company_id == any_(literal(list(company_ids), ARRAY(Integer)))
+        ).all()
+        by_id = {company.company_id: company for company in companies}
+        return [by_id[company_id] for company_id in company_ids if company_id in by_id]
+
     @staticmethod
     def get_similar_companies(db: Session, okved: str, current_inn: str, limit: int = 10) -> List[Company]:
         """Получить похожие компании по ОКВЭД"""
         if not okved:
             return []
 
+        # В okved может быть не только код: берем первый код ОКВЭД из строки
+        okved_match = OKVED_CODE_RE.search(okved)
+        if not okved_match:
+            return []
+
         current_inn_clean = current_inn.strip()
 
         similar = db.query(Company).filter(
-            or_(
-                Company.okved.like(f"%{okved}%"),
-                Company.okved_o.like(f"%{okved}%")
-            ),
-            Company.inn != current_inn_clean,
+            DatabaseService._okved_condition(okved_match.group(0)),
+            Company.inn_norm != DatabaseService.normalize_inn(current_inn_clean),
             # НОВОЕ: Исключаем организации с ИНН, заканчивающимся на .0
-            not_(Company.inn.like('%.0'))
+            not_(Company.inn_artifact)
         ).order_by(Company.name).limit(limit).all()
 
         print(f"Поиск похожих компаний по ОКВЭД {okved}: найдено {len(similar)} компаний")
 
-        return similar
\ No newline at end of file
+        return similar
+
+
+# Перезагрузка данных делает кэшированные результаты поиска неактуальными
+data_version.on_change(DatabaseService.clear_caches)
\ No newline at end of file
@@ -1,6 +1,8 @@
-import requests
 from typing import Optional, Dict, Any
 from app.core.config import settings
+from app.core.http_client import get_http_client, request_timeout
+from app.core.singleflight import external_calls
+from app.services.api_cache_service import ApiCacheService
 
 
 class DataNewtonService:
@@ -9,8 +11,23 @@ class DataNewtonService:
         self.api_key = settings.datanewton_api_key
         self.base_url = settings.datanewton_base_url
 
-    async def get_counterparty(self, inn: str) -> Optional[Dict[str, Any]]:
-        """Получить информацию о контрагенте"""
+    async def get_counterparty(self, inn: str, refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """Получить информацию о контрагенте (через кэш api_cache; refresh - запросить API заново)"""
+        inn = inn.strip()
+        # Одновременные запросы по одному ИНН ждут общий вызов
+        return await external_calls.do(("counterparty", inn, refresh), lambda: ApiCacheService.fetch(
+            "counterparty", inn, lambda: self._fetch_counterparty(inn), refresh
+        ))
+
+    async def get_finance(self, inn: str, refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """Получить финансовые данные (через кэш api_cache; refresh - запросить API заново)"""
+        inn = inn.strip()
+        return await external_calls.do(("finance", inn, refresh), lambda: ApiCacheService.fetch(
+            "finance", inn, lambda: self._fetch_finance(inn), refresh
+        ))
+
+    async def _fetch_counterparty(self, inn: str) -> Optional[Dict[str, Any]]:
+        """Запрос информации о контрагенте к API"""
         url = f"{self.base_url}/v1/counterparty"
         params = {
             "key": self.api_key,
@@ -19,16 +36,18 @@ class DataNewtonService:
         }
 
         try:
-            # Используем requests в синхронном режиме
-            response = requests.get(url, params=params, timeout=30)
+            # Общий асинхронный клиент: ожидание ответа не блокирует event loop
+            response = await get_http_client().get(
+                url, params=params, timeout=request_timeout(settings.datanewton_timeout)
+            )
             response.raise_for_status()
             return response.json()
         except Exception as e:
             print(f"Error getting counterparty data: {e}")
             return None
 
-    async def get_finance(self, inn: str) -> Optional[Dict[str, Any]]:
-        """Получить финансовые данные"""
+    async def _fetch_finance(self, inn: str) -> Optional[Dict[str, Any]]:
+        """Запрос финансовых данных к API"""
         url = f"{self.base_url}/v1/finance"
         params = {
             "key": self.api_key,
@@ -36,8 +55,10 @@ class DataNewtonService:
         }
 
         try:
-            # Используем requests в синхронном режиме
-            response = requests.get(url, params=params, timeout=30)
+            # Общий асинхронный клиент: ожидание ответа не блокирует event loop
+            response = await get_http_client().get(
+                url, params=params, timeout=request_timeout(settings.datanewton_timeout)
+            )
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -0,0 +1,159 @@
+# backend/app/services/industry_percentile_service.py
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import and_, text
+from sqlalchemy.orm import Session
+
+from app.models.company import Company
+from app.models.company_okved import CompanyOkved
+from app.models.industry_percentile import IndustryPercentile
+from app.models.report import Report
+
+logger = logging.getLogger(__name__)
+
+# Показатели и их расчет по строке report (SQL); нули - как и пропуски - не учитываются
+METRIC_SQL = {
+    "revenue": "r.revenue_cur",
+    "net_profit": "r.net_profit_cur",
+    # Рентабельность по чистой прибыли, %
+    "margin": "CASE WHEN r.revenue_cur > 0 THEN r.net_profit_cur / r.revenue_cur * 100 END",
+    "assets": "r.balance_assets_eoy",
+    "equity": "r.equity_eoy",
+}
+METRICS = tuple(METRIC_SQL)
+# Строка распределения по всем регионам
+ALL_REGIONS = "*"
+# Перцентили 0, 1, ..., 100
+PERCENTILE_FRACTIONS = [i / 100 for i in range(101)]
+
+REBUILD_SQL = f"""
+    WITH company_class AS (
+        SELECT c.company_id, coalesce(c.kod_re, '') AS kod_re, p.class_code
+        FROM company AS c
+        JOIN LATERAL (
+            SELECT class_code
+            FROM company_okved
+            WHERE company_okved.company_id = c.company_id AND company_okved.is_primary
+            ORDER BY code
+            LIMIT 1
+        ) AS p ON TRUE
+        WHERE NOT c.inn_artifact AND p.class_code IS NOT NULL
+    ),
+    metric_value AS (
+        SELECT cc.class_code, cc.kod_re, r.year, m.metric, m.value
+        FROM report AS r
+        JOIN company_class AS cc ON cc.company_id = r.company_id
+        CROSS JOIN LATERAL (VALUES
+            {", ".join(f"('{metric}', ({expression})::double precision)" for metric, expression in METRIC_SQL.items())}
+        ) AS m(metric, value)
+        WHERE m.value IS NOT NULL AND m.value <> 0
+    )
+    INSERT INTO industry_percentile (class_code, kod_re, year, metric, company_count, percentiles, computed_at)
+    SELECT class_code, coalesce(kod_re, '{ALL_REGIONS}'), year, metric, COUNT(*),
+           percentile_cont(CAST(:fractions AS double precision[])) WITHIN GROUP (ORDER BY value),
+           now()
+    FROM metric_value
+    GROUP BY GROUPING SETS ((class_code, kod_re, year, metric), (class_code, year, metric))
+    HAVING COUNT(*) >= :min_companies
+"""
+
+
+class IndustryPercentileService:
+    """Распределения показателей по классу ОКВЭД, региону и году и место компании в них.
+
+    Таблица industry_percentile пересчитывается целиком (app.cli.compute_percentiles):
+    для каждой группы хранится 101 значение перцентилей, поэтому место компании
+    находится по одной строке без сортировки отчетов других компаний.
+    """
+
+    @staticmethod
+    def rebuild(db: Session, min_companies: int) -> int:
+        """Пересчитывает таблицу в одной транзакции. Возвращает число строк"""
+        db.query(IndustryPercentile).delete(synchronize_session=False)
+        result = db.execute(text(REBUILD_SQL), {
+            "fractions": PERCENTILE_FRACTIONS,
+            "min_companies": min_companies,
+        })
+        db.commit()
+        return result.rowcount
+
+    @staticmethod
+    def metric_values(report: Report) -> Dict[str, Optional[float]]:
+        """Показатели отчета компании так же, как в METRIC_SQL (0 и пропуск - None)"""
+        revenue = report.revenue_cur
+        values = {
+            "revenue": revenue,
+            "net_profit": report.net_profit_cur,
+            "margin": report.net_profit_cur / revenue * 100
+            if revenue and revenue > 0 and report.net_profit_cur is not None else None,
+            "assets": report.balance_assets_eoy,
+            "equity": report.equity_eoy,
+        }
+        return {metric: float(value) if value else None for metric, value in values.items()}
+
+    @staticmethod
+    def percentile_rank(percentiles: List[float], value: float) -> float:
+        """Место значения в распределении, 0-100: линейная интерполяция между перцентилями"""
+        points = np.asarray(percentiles, dtype=float)
+        last = len(points) - 1
+
+        lo = int(np.searchsorted(points, value, side="left"))
+        hi = int(np.searchsorted(points, value, side="right"))
+        if lo < hi:
+            # Значение совпадает с одним или несколькими перцентилями (в том числе крайними) - середина
+            rank = (lo + hi - 1) / 2
+        elif lo == 0:
+            return 0.0
+        elif lo > last:
+            return 100.0
+        else:
+            rank = lo - 1 + (value - points[lo - 1]) / (points[lo] - points[lo - 1])
+        return round(rank * 100 / last, 1)
+
+    @staticmethod
+    def get_company_class(db: Session, inn_norm: str):
+        """Компания по ИНН и класс ее основного ОКВЭД одним запросом"""
+        return db.query(Company, CompanyOkved.class_code).outerjoin(
+            CompanyOkved, and_(CompanyOkved.company_id == Company.company_id, CompanyOkved.is_primary)
+        ).filter(Company.inn_norm == inn_norm).order_by(CompanyOkved.code).first()
+
+    @staticmethod
+    def get_report(db: Session, company_id: int, year: Optional[int]) -> Optional[Report]:
+        """Отчет компании за год (по умолчанию - последний)"""
+        query = db.query(Report).filter(Report.company_id == company_id)
+        if year is not None:
+            return query.filter(Report.year == year).first()
+        return query.order_by(Report.year.desc()).first()
+
+    @staticmethod
+    def get_distributions(db: Session, class_code: str, kod_re: str, year: int) -> Dict[str, Dict[str, Any]]:
+        """Распределения класса за год: {регион или *: {показатель: строка}}"""
+        rows = db.query(IndustryPercentile).filter(
+            IndustryPercentile.class_code == class_code,
+            IndustryPercentile.kod_re.in_([kod_re, ALL_REGIONS]),
+            IndustryPercentile.year == year,
+        ).all()
+
+        result: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            result.setdefault(row.kod_re, {})[row.metric] = row
+        return result
+
+    @staticmethod
+    def place_company(values: Dict[str, Optional[float]],
+                      distributions: Dict[str, IndustryPercentile]) -> Dict[str, Any]:
+        """Место показателей компании в распределениях одной группы"""
+        placed = {}
+        for metric in METRICS:
+            distribution = distributions.get(metric)
+            value = values.get(metric)
+            if distribution is None or value is None:
+                continue
+            placed[metric] = {
+                "percentile": IndustryPercentileService.percentile_rank(distribution.percentiles, value),
+                "company_count": distribution.company_count,
+                "median": distribution.percentiles[50],
+            }
+        return placed
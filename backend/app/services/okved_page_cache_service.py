@@ -0,0 +1,101 @@
+# backend/app/services/okved_page_cache_service.py
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.singleflight import external_calls
+from app.models.okved_page_cache import OkvedPageCache
+
+logger = logging.getLogger(__name__)
+
+# Последние использованные страницы - в памяти процесса, остальные - в таблице okved_page_cache
+_pages = TTLCache(maxsize=settings.okved_page_cache_size, ttl=settings.okved_page_cache_ttl)
+
+
+class OkvedPageCacheService:
+    """Кэш разобранных страниц кодов ОКВЭД RusProfile по URL.
+
+    Страница одна на всю отрасль, поэтому ее запрашивают и разбирают один раз:
+    следующие компании с тем же кодом получают словарь из памяти или из таблицы,
+    пока запись моложе okved_page_cache_ttl.
+    """
+
+    @staticmethod
+    def load(url: str) -> Optional[Tuple[Dict[str, Any], datetime]]:
+        """Сохраненная страница и время ее получения"""
+        db = SessionLocal()
+        try:
+            entry = db.get(OkvedPageCache, url)
+            return (entry.payload, entry.fetched_at) if entry else None
+        finally:
+            db.close()
+
+    @staticmethod
+    def store(url: str, payload: Dict[str, Any]) -> None:
+        db = SessionLocal()
+        try:
+            statement = insert(OkvedPageCache).values(
+                url=url, payload=payload, fetched_at=datetime.now(timezone.utc)
+            )
+            db.execute(statement.on_conflict_do_update(
+                index_elements=[OkvedPageCache.url],
+                set_={"payload": statement.excluded.payload, "fetched_at": statement.excluded.fetched_at},
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def purge() -> int:
+        """Удаляет все сохраненные страницы. Возвращает число удаленных"""
+        _pages.clear()
+        db = SessionLocal()
+        try:
+            deleted = db.query(OkvedPageCache).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+    @staticmethod
+    async def fetch(url: str, call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Страница из памяти, из таблицы или через call (одновременные запросы одного URL - один вызов)"""
+        payload = _pages.get(url)
+        if payload is not None:
+            return payload
+        return await external_calls.do(("okved_page", url), lambda: OkvedPageCacheService._load_or_call(url, call))
+
+    @staticmethod
+    async def _load_or_call(url: str, call: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        try:
+            cached = await asyncio.to_thread(OkvedPageCacheService.load, url)
+        except Exception as e:
+            logger.error(f"Ошибка чтения okved_page_cache ({url}): {e}")
+            cached = None
+
+        if cached is not None:
+            payload, fetched_at = cached
+            remaining = settings.okved_page_cache_ttl - (datetime.now(timezone.utc) - fetched_at).total_seconds()
+            if remaining > 0:
+                _pages.set(url, payload, ttl=remaining)
+                return payload
+
+        payload = await call()
+        # Пустой словарь - ошибка запроса или разбора: не сохраняем, чтобы запросить снова
+        if payload:
+            _pages.set(url, payload)
+            try:
+                await asyncio.to_thread(OkvedPageCacheService.store, url, payload)
+            except Exception as e:
+                logger.error(f"Ошибка записи okved_page_cache ({url}): {e}")
+        return payload
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        return _pages.stats()
@@ -1,11 +1,21 @@
 # backend/app/services/prediction_service.py
 import numpy as np
-from typing import List, Optional, Dict, Any
+from datetime import datetime, timezone
+from typing import List, Optional, Dict, Any, Tuple
+from app.core.database import SessionLocal
 from app.schemas.company import FinancialReport, PredictedFinancialData
+from app.services.database_service import DatabaseService
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Версия модели: меняется при изменении расчета, сохраненные предсказания других версий не используются
+MODEL_VERSION = "linear-trend-1"
+
+# Показатели, которые предсказываются, и показатели, по стабильности которых считается уверенность
+PREDICTED_METRICS = ("revenue_cur", "net_profit_cur", "balance_assets_eoy", "equity_eoy")
+CONFIDENCE_METRICS = ("revenue_cur", "net_profit_cur")
+
 
 class FinancialPredictionService:
     """Сервис для предсказания финансовых показателей на основе трендового анализа"""
@@ -190,6 +200,140 @@ class FinancialPredictionService:
             logger.error(f"Ошибка при расчете стабильности тренда: {e}")
             return 0.5
 
+    @staticmethod
+    def batch_arrays(
+            companies_reports: List[List[FinancialReport]]
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray], np.ndarray]:
+        """
+        Отчеты многих компаний в виде массивов для predict_batch: годы (T,),
+        показатели (компании x годы, NaN - нет значения) и маска наличия отчета за год
+        """
+        years = np.array(sorted({report.year for reports in companies_reports for report in reports}))
+        column = {year: i for i, year in enumerate(years.tolist())}
+        shape = (len(companies_reports), len(years))
+
+        present = np.zeros(shape, dtype=bool)
+        metrics = {metric: np.full(shape, np.nan) for metric in PREDICTED_METRICS}
+        for i, reports in enumerate(companies_reports):
+            for report in reports:
+                j = column[report.year]
+                present[i, j] = True
+                for metric, values in metrics.items():
+                    value = getattr(report, metric)
+                    if value is not None:
+                        values[i, j] = value
+
+        return years, metrics, present
+
+    @staticmethod
+    def predict_batch(years: np.ndarray, metrics: Dict[str, np.ndarray],
+                      present: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Предсказание на следующий год сразу для многих компаний, тот же результат, что predict_next_year.
+
+        years   - годы столбцов (T,)
+        metrics - показатели PREDICTED_METRICS, массивы (компании x годы), NaN - нет значения
+        present - есть ли у компании отчет за год (по умолчанию - есть хотя бы один показатель)
+
+        Линейная регрессия по каждой компании решается в замкнутом виде по маскированным
+        суммам (пропуски и нули не участвуют, как в _predict_metric). Возвращает массивы (компании,):
+        year, показатели и confidence; NaN там, где predict_next_year вернул бы None,
+        valid - у компании не меньше двух отчетов.
+        """
+        order = np.argsort(years)
+        years = np.asarray(years, dtype=float)[order]
+        metrics = {metric: np.asarray(values, dtype=float)[:, order] for metric, values in metrics.items()}
+        if present is None:
+            present = np.zeros(next(iter(metrics.values())).shape, dtype=bool)
+            for values in metrics.values():
+                present |= ~np.isnan(values)
+        else:
+            present = np.asarray(present, dtype=bool)[:, order]
+
+        report_counts = present.sum(axis=1)
+        valid = report_counts >= 2
+        # Следующий год - после последнего отчета компании
+        last_column = present.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+        next_year = np.where(valid, years[last_column] + 1, np.nan) if len(years) else np.full(len(present), np.nan)
+
+        result = {"year": next_year, "valid": valid}
+        for metric in PREDICTED_METRICS:
+            if metric in metrics:
+                predicted = FinancialPredictionService._predict_metric_batch(
+                    years, metrics[metric], present, next_year
+                )
+                predicted[~valid] = np.nan
+                result[metric] = predicted
+
+        confidence = FinancialPredictionService._calculate_confidence_batch(metrics, present, report_counts)
+        confidence[~valid] = np.nan
+        result["confidence"] = confidence
+        return result
+
+    @staticmethod
+    def _predict_metric_batch(years: np.ndarray, values: np.ndarray, present: np.ndarray,
+                              next_year: np.ndarray) -> np.ndarray:
+        """Векторный аналог _predict_metric и _apply_constraints для всех компаний"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            usable = present & ~np.isnan(values) & (values != 0)
+            counts = usable.sum(axis=1)
+            y = np.where(usable, values, 0.0)
+
+            # Регрессия по центрированным годам: точнее, чем по абсолютным (2020, 2021, ...)
+            mean_x = (usable * years).sum(axis=1) / counts
+            mean_y = y.sum(axis=1) / counts
+            dx = np.where(usable, years - mean_x[:, None], 0.0)
+            dy = np.where(usable, values - mean_y[:, None], 0.0)
+            slope = (dx * dy).sum(axis=1) / (dx * dx).sum(axis=1)
+            predicted = mean_y + slope * (next_year - mean_x)
+
+            # Ограничения: изменение не больше 200% от среднего модуля значений
+            max_change = 2.0 * np.abs(y).sum(axis=1) / counts
+            last_usable = values.shape[1] - 1 - np.argmax(usable[:, ::-1], axis=1)
+            last_value = y[np.arange(len(y)), last_usable]
+            change = predicted - last_value
+            predicted = np.where(change > max_change, last_value + max_change, predicted)
+            predicted = np.where(change < -max_change, last_value - max_change, predicted)
+
+            # Показатель, который всегда был неотрицательным, не уходит в минус
+            never_negative = ~(usable & (values < 0)).any(axis=1)
+            predicted = np.where(
+                (predicted < 0) & never_negative, np.maximum(0, last_value * 0.1), predicted
+            )
+
+        predicted[counts < 2] = np.nan
+        return predicted
+
+    @staticmethod
+    def _calculate_confidence_batch(metrics: Dict[str, np.ndarray], present: np.ndarray,
+                                    report_counts: np.ndarray) -> np.ndarray:
+        """Векторный аналог _calculate_confidence и _calculate_trend_stability"""
+        stability_sum = np.zeros(len(present))
+        stability_count = np.zeros(len(present))
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for metric in CONFIDENCE_METRICS:
+                if metric not in metrics:
+                    continue
+                values = metrics[metric]
+                known = present & ~np.isnan(values)
+                counts = known.sum(axis=1)
+                mean = np.where(known, values, 0.0).sum(axis=1) / counts
+                std = np.sqrt(np.where(known, (values - mean[:, None]) ** 2, 0.0).sum(axis=1) / counts)
+                cv = std / np.abs(mean)
+
+                stability = np.where(cv < 0.1, 0.9, np.where(cv > 1.0, 0.1, 0.9 - cv * 0.8))
+                stability = np.where(mean == 0, 0.3, stability)
+
+                enough = counts >= 3
+                stability_sum += np.where(enough, stability, 0.0)
+                stability_count += enough
+
+            data_bonus = np.minimum(0.2, report_counts * 0.05)
+            confidence = np.minimum(0.95, stability_sum / stability_count + data_bonus)
+
+        return np.where((report_counts >= 3) & (stability_count > 0), confidence, 0.5)
+
     @staticmethod
     def get_prediction_explanation(predicted_data: PredictedFinancialData, reports: List[FinancialReport]) -> Dict[
         str, Any]:
@@ -236,4 +380,41 @@ class FinancialPredictionService:
         elif confidence >= 0.4:
             return "Ниже средней"
         else:
-            return "Низкая"
\ No newline at end of file
+            return "Низкая"
+
+
+def prediction_row(company_id: int, predicted_data: PredictedFinancialData, explanation: Dict[str, Any],
+                   reports: List[FinancialReport], computed_at: Optional[datetime] = None) -> Dict[str, Any]:
+    """Строка таблицы prediction по результату predict_next_year"""
+    return {
+        "company_id": company_id,
+        "model_version": MODEL_VERSION,
+        **predicted_data.model_dump(),
+        "explanation": explanation,
+        "base_data_years": len(reports),
+        "last_year": max(report.year for report in reports),
+        "computed_at": computed_at or datetime.now(timezone.utc),
+    }
+
+
+def prediction_response(prediction: Any) -> Dict[str, Any]:
+    """Ответ /{inn}/prediction из строки prediction (модели или словаря prediction_row)"""
+    row = prediction if isinstance(prediction, dict) else {
+        column.name: getattr(prediction, column.name) for column in prediction.__table__.columns
+    }
+    return {
+        "prediction": PredictedFinancialData.model_validate(row),
+        "explanation": row["explanation"],
+        "base_data_years": row["base_data_years"],
+        "last_year": row["last_year"],
+        "model_version": row["model_version"],
+        "computed_at": row["computed_at"],
+    }
+
+
+def store_predictions(rows: List[Dict[str, Any]]) -> None:
+    db = SessionLocal()
+    try:
+        DatabaseService.save_predictions(db, rows)
+    finally:
+        db.close()
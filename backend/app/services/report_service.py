@@ -0,0 +1,193 @@
+# backend/app/services/report_service.py
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.schemas.company import FinancialReport
+from app.services.api_cache_service import ApiCacheService
+from app.services.database_service import API_REPORT_FIELDS, DatabaseService
+from app.services.datanewton_service import DataNewtonService
+
+
+async def get_company_reports(
+        company_id: Optional[int], inn: str, refresh: bool = False
+) -> Optional[List[FinancialReport]]:
+    """
+    Финансовые отчеты компании. Сначала из таблицы api_report: если финансы DataNewton
+    записаны туда не раньше settings.report_max_age назад, внешний запрос не нужен.
+    Иначе (или при refresh) - из DataNewton с записью результата в api_report.
+    Если API не вернул данных, отдаются сохраненные отчеты, даже устаревшие; None - данных нет
+    """
+    if company_id is None:
+        finance_data = await DataNewtonService().get_finance(inn, refresh=refresh)
+        return convert_api_finance_to_reports(finance_data) if finance_data else None
+
+    stored = []
+    if not refresh:
+        stored, fetched_at = await asyncio.to_thread(load_stored_reports, company_id)
+        if stored and (datetime.now(timezone.utc) - fetched_at).total_seconds() < settings.report_max_age:
+            return stored
+
+    # В api_report записывается время получения самого ответа: свежий ответ api_cache берется
+    # с его fetched_at, иначе - запрос к API мимо кэша. Устаревший ответ api_cache (его отдает
+    # get_finance без refresh, обновляя в фоне) записался бы с текущим временем и считался бы свежим
+    cached = None if refresh else await asyncio.to_thread(ApiCacheService.load, "finance", inn.strip())
+    if cached is not None and \
+            (datetime.now(timezone.utc) - cached[1]).total_seconds() < ApiCacheService.ttl("finance"):
+        finance_data, fetched_at = cached
+    else:
+        finance_data = await DataNewtonService().get_finance(inn, refresh=True)
+        fetched_at = datetime.now(timezone.utc)
+    if not finance_data:
+        return stored or None
+
+    reports = convert_api_finance_to_reports(finance_data)
+    try:
+        await asyncio.to_thread(store_reports, company_id, reports, fetched_at)
+    except Exception as e:
+        print(f"Ошибка сохранения отчетов компании {company_id}: {e}")
+    return reports
+
+
+def load_stored_reports(company_id: int) -> Tuple[List[FinancialReport], Optional[datetime]]:
+    """Отчеты компании из api_report и время последней записи"""
+    db = SessionLocal()
+    try:
+        rows = DatabaseService.get_api_reports(db, company_id)
+        fetched_at = max((row.fetched_at for row in rows), default=None)
+        return [FinancialReport.model_validate(row) for row in rows], fetched_at
+    finally:
+        db.close()
+
+
+def store_reports(company_id: int, reports: List[FinancialReport], fetched_at: datetime) -> None:
+    db = SessionLocal()
+    try:
+        DatabaseService.save_api_reports(db, company_id, reports, fetched_at)
+    finally:
+        db.close()
+
+
+# Суммы выгрузки (таблица report) - в тысячах рублей, как и в ответах DataNewton; api_report - в рублях
+BULK_REPORT_MULTIPLIER = 1000
+
+
+def bulk_report_in_rubles(row) -> FinancialReport:
+    """Отчет выгрузки в единицах api_report"""
+    values = {field: getattr(row, field) for field in API_REPORT_FIELDS}
+    return FinancialReport(year=row.year, **{
+        field: None if value is None else float(value) * BULK_REPORT_MULTIPLIER for field, value in values.items()
+    })
+
+
+def merge_prediction_reports(bulk_rows: List[Any], api_rows: List[Any]) -> List[FinancialReport]:
+    """
+    Отчеты для предсказания, по возрастанию года: за год, который есть в api_report, - финансы DataNewton,
+    за остальные - отчет выгрузки в рублях (из повторов за год - последний загруженный)
+    """
+    by_year = {row.year: bulk_report_in_rubles(row) for row in bulk_rows}
+    by_year.update({row.year: FinancialReport.model_validate(row) for row in api_rows})
+    return [by_year[year] for year in sorted(by_year)]
+
+
+def load_prediction_reports(company_ids: List[int]) -> List[List[FinancialReport]]:
+    """Отчеты для предсказания (merge_prediction_reports) компаний из списка, в порядке списка"""
+    db = SessionLocal()
+    try:
+        bulk = DatabaseService.get_reports_by_company(db, company_ids)
+        api = DatabaseService.get_api_reports_by_company(db, company_ids)
+        return [merge_prediction_reports(bulk.get(company_id, []), api.get(company_id, []))
+                for company_id in company_ids]
+    finally:
+        db.close()
+
+
+# Строки РСБУ в финансах DataNewton и поля отчета: (раздел, код строки,
+# поле за отчетный год, поле за предыдущий год - значение той же строки годом раньше)
+RSBU_REPORT_FIELDS = (
+    # Бухгалтерский баланс
+    ("balances", "1110", "intangible_assets_eoy", "intangible_assets_poy"),
+    ("balances", "1200", "curr_assets_eoy", "curr_assets_poy"),
+    ("balances", "1600", "balance_assets_eoy", "balance_assets_poy"),
+    ("balances", "1370", "retained_earnings_eoy", "retained_earnings_poy"),
+    ("balances", "1300", "equity_eoy", "equity_poy"),
+    ("balances", "1400", "lt_liabilities_eoy", "lt_liabilities_poy"),
+    ("balances", "1500", "st_liabilities_eoy", "st_liabilities_poy"),
+    ("balances", "1700", "balance_liab_eoy", "balance_liab_poy"),
+    # Отчет о финансовых результатах
+    ("fin_results", "2110", "revenue_cur", "revenue_prev"),
+    ("fin_results", "2100", "gross_profit_cur", "gross_profit_prev"),
+    ("fin_results", "2200", "oper_profit_cur", "oper_profit_prev"),
+    ("fin_results", "2300", "pbt_cur", "pbt_prev"),
+    ("fin_results", "2410", "income_tax_cur", "income_tax_prev"),
+    ("fin_results", "2400", "net_profit_cur", "net_profit_prev"),
+)
+
+
+# Поля, которые конвертер заполнял и раньше: пропуск в ответе по-прежнему дает 0.0.
+# Остальные поля при пропуске - None, чтобы отсутствие строки не выглядело нулевой суммой
+ZERO_WHEN_MISSING_FIELDS = frozenset((
+    "revenue_cur", "gross_profit_cur", "oper_profit_cur", "net_profit_cur", "balance_assets_eoy", "equity_eoy",
+))
+
+
+def convert_api_finance_to_reports(finance_data):
+    """
+    Преобразует данные из API в отчеты со всеми полями report (ИСПРАВЛЕНИЕ: умножаем на 1000).
+    Показатели каждого раздела за один проход раскладываются в индекс код -> год -> значение
+    """
+    reports = []
+
+    balances = finance_data.get('balances', {})
+    fin_results = finance_data.get('fin_results', {})
+    indexes = {
+        'balances': index_finance_indicators(balances),
+        'fin_results': index_finance_indicators(fin_results),
+    }
+
+    balance_years = balances.get('years', [])
+    fin_years = fin_results.get('years', [])
+    all_years = sorted(set(balance_years + fin_years))
+
+    for year in all_years:
+        year_str, previous_str = str(year), str(int(year) - 1)
+
+        # ИСПРАВЛЕНИЕ: Умножаем все финансовые данные на 1000 (так как они в тысячах)
+        values = {}
+        for section, code, current_field, previous_field in RSBU_REPORT_FIELDS:
+            sums = indexes[section].get(code, {})
+            values[current_field] = report_value(current_field, sums.get(year_str))
+            values[previous_field] = report_value(previous_field, sums.get(previous_str))
+
+        reports.append(FinancialReport(year=year, **values))
+
+    return reports
+
+
+def index_finance_indicators(section) -> Dict[str, Dict[str, Any]]:
+    """Суммы показателей раздела по коду строки: {код: {год: значение}} (при повторе кода - первая строка)"""
+    index = {}
+    for indicator in section.get('indicators', []) or []:
+        if not isinstance(indicator, dict):
+            continue
+        code = indicator.get('code')
+        if code not in index:
+            sums = indicator.get('sum')
+            index[code] = sums if isinstance(sums, dict) else {}
+    return index
+
+
+def report_value(field: str, value) -> Optional[float]:
+    """Значение поля отчета в рублях; пропуск - 0.0 для ZERO_WHEN_MISSING_FIELDS, иначе None"""
+    if value is None and field not in ZERO_WHEN_MISSING_FIELDS:
+        return None
+    return multiply_by_thousand(value)
+
+
+def multiply_by_thousand(value):
+    """Умножает значение на 1000, обрабатывая None и 0"""
+    if value is None or value == 0:
+        return 0.0
+    return float(value) * 1000
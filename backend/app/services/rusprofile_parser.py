@@ -0,0 +1,262 @@
+# backend/app/services/rusprofile_parser.py
+"""
+Разбор страниц RusProfile. Функции принимают HTML и возвращают обычный dict,
+поэтому выполняются в пуле процессов (app.core.parse_pool).
+
+Страница компании разбирается по дереву lxml с заранее скомпилированными XPath.
+
+Возвращает тот же словарь, что и прежний разбор через BeautifulSoup
+(те же ключи в том же порядке, тот же текст), но без десятков повторных
+проходов по дереву: каждое выражение ищет только свой элемент. Единственное
+отличие - страница с заголовком "Уставный капитал" без значения: прежний разбор
+завершался ошибкой, этот возвращает остальные поля и пустой authorized_capital.
+"""
+import re
+from typing import Any, Dict, Iterator, Optional
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+# Текст этих элементов BeautifulSoup не включает в .text / get_text()
+NON_TEXT_TAGS = {"script", "style", "template"}
+
+STAT_CODES = ("okpo", "okato", "oktmo", "okfs", "okogu", "okopf")
+
+ARBITRATION_CASES_RE = re.compile(r"(\d+)\s*дел")
+ARBITRATION_SUM_RE = re.compile(r"на сумму\s*([\d\s]+(?:млн)?\s*руб)")
+
+
+def _has_class(name: str) -> str:
+    """Условие XPath: в атрибуте class есть класс name (как .name в CSS)"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _first(expression: str) -> etree.XPath:
+    return etree.XPath(f"({expression})[1]")
+
+
+XPATH = {
+    "company_name": _first("//h1[@itemprop='name']"),
+    "full_name": _first("//span[@id='clip_name-long']"),
+    "ogrn": _first("//span[@id='clip_ogrn']"),
+    "inn": _first("//span[@id='clip_inn']"),
+    "kpp": _first("//span[@id='clip_kpp']"),
+    "registration_date": _first("//dd[@itemprop='foundingDate']"),
+    "capital_titles": etree.XPath("//dt"),
+    "next_dd": _first("descendant::dd | following::dd"),
+    "status_success": _first("//span[normalize-space(@class)='company-header__icon success']"),
+    "status_danger": _first("//span[normalize-space(@class)='company-header__icon danger']"),
+    "legal_address": _first("//span[@id='clip_address']"),
+    "director": _first("//a[starts-with(@href, '/person/')]"),
+    "stat_code": etree.XPath("(//span[@id=$id])[1]"),
+    "founder": _first(
+        f"//*[{_has_class('tile-item')} and {_has_class('founders-tile')}]"
+        f"//*[{_has_class('founder-item__title')}]//a"
+    ),
+    "total_connections": _first("//a[normalize-space(@class)='num gtm_c_all']"),
+    "connections_by_address": _first("//a[normalize-space(@class)='num gtm_c_1']"),
+    "connections_by_director": _first("//a[normalize-space(@class)='num gtm_c_2']"),
+    "connections_by_founder": _first("//a[normalize-space(@class)='num gtm_c_3']"),
+    "gz_tile": _first("//div[normalize-space(@class)='tile-item tab-parent gz-tile']"),
+    "gz_dl": _first(f".//dl[{_has_class('founder-item__dl')}]"),
+    "gz_dt": _first(".//dt"),
+    "gz_dd": _first(".//dd"),
+    "gz_contractor": _first(f".//*[{_has_class('founder-item__title')}]//a"),
+    "arbitration_tile": _first("//div[normalize-space(@class)='tile-item tab-parent arbitr-tile']"),
+    "tile_num": _first(".//div[normalize-space(@class)='connexion-col__num tosmall']"),
+    "taxes_tile": _first("//div[normalize-space(@class)='tile-item taxes-tile']"),
+    "taxes_cols": etree.XPath(f".//*[{_has_class('connexion-col')}]"),
+    "col_title": _first(f".//div[{_has_class('connexion-col__title')}]"),
+    "okved_link": _first("//a[starts-with(@href, '/okved/')]"),
+}
+
+
+def _strings(element) -> Iterator[str]:
+    """Текстовые узлы внутри элемента в порядке документа (как strings в BeautifulSoup)"""
+    if element.text and element.tag not in NON_TEXT_TAGS:
+        yield element.text
+    for child in element:
+        # Комментарии и инструкции обработки в текст не входят, их хвост - входит
+        if isinstance(child.tag, str):
+            yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _text(element, separator: str = "") -> str:
+    return separator.join(_strings(element))
+
+
+def _stripped(element) -> str:
+    """Текст элемента без пробелов по краям или пустая строка, если элемента нет"""
+    return _text(element).strip() if element is not None else ""
+
+
+def _single_string(element) -> Optional[str]:
+    """Аналог Tag.string: единственный текстовый потомок (через единственного ребенка)"""
+    children = []
+    if element.text:
+        children.append(element.text)
+    for child in element:
+        children.append(child)
+        if child.tail:
+            children.append(child.tail)
+
+    if len(children) != 1:
+        return None
+    child = children[0]
+    if isinstance(child, str):
+        return child
+    if not isinstance(child.tag, str):
+        # Единственный ребенок - комментарий
+        return child.text
+    return _single_string(child)
+
+
+def _first_match(expression: etree.XPath, context, **variables) -> Optional[etree._Element]:
+    found = expression(context, **variables)
+    return found[0] if found else None
+
+
+def parse_html(html: str):
+    """Корень дерева lxml (пустой документ - пустой элемент html)"""
+    root = etree.fromstring(html.encode("utf-8"), etree.HTMLParser(encoding="utf-8")) if html else None
+    return root if root is not None else etree.Element("html")
+
+
+def parse_company_page(html: str, base_url: str) -> Dict[str, Any]:
+    """Данные компании со страницы RusProfile (ключи и значения - как у прежнего разбора)"""
+    root = parse_html(html)
+    data = {}
+
+    # Основные сведения
+    for field in ("company_name", "full_name", "ogrn", "inn", "kpp", "registration_date"):
+        data[field] = _stripped(_first_match(XPATH[field], root))
+
+    # Значение - первый dd после заголовка; заголовок без значения - пустая строка
+    # (прежний разбор на такой странице завершался ошибкой и терял все остальные поля)
+    capital = ""
+    for title in XPATH["capital_titles"](root):
+        if _single_string(title) == "Уставный капитал":
+            capital = _stripped(_first_match(XPATH["next_dd"], title))
+            break
+    data["authorized_capital"] = capital
+
+    status = _first_match(XPATH["status_success"], root)
+    if status is None:
+        status = _first_match(XPATH["status_danger"], root)
+    data["status"] = _stripped(status)
+
+    data["legal_address"] = _stripped(_first_match(XPATH["legal_address"], root))
+
+    # Руководитель
+    data["director"] = _stripped(_first_match(XPATH["director"], root))
+
+    # Коды статистики
+    for code in STAT_CODES:
+        data[code] = _stripped(_first_match(XPATH["stat_code"], root, id=f"clip_{code}"))
+
+    # Учредитель и связи
+    for field in ("founder", "total_connections", "connections_by_address",
+                  "connections_by_director", "connections_by_founder"):
+        data[field] = _stripped(_first_match(XPATH[field], root))
+
+    # Госзакупки
+    gz = _first_match(XPATH["gz_tile"], root)
+    if gz is not None:
+        dl = _first_match(XPATH["gz_dl"], gz)
+        if dl is not None:
+            data["government_contracts_count"] = _stripped(_first_match(XPATH["gz_dt"], dl))
+            data["government_contracts_sum"] = _stripped(_first_match(XPATH["gz_dd"], dl))
+        data["main_contractor"] = _stripped(_first_match(XPATH["gz_contractor"], gz))
+
+    # Арбитраж
+    arbitration = _first_match(XPATH["arbitration_tile"], root)
+    if arbitration is not None:
+        num = _first_match(XPATH["tile_num"], arbitration)
+        if num is not None:
+            text = _text(num, " ")
+            cases = ARBITRATION_CASES_RE.search(text)
+            amount = ARBITRATION_SUM_RE.search(text)
+            data["arbitration_cases"] = f"{cases.group(1)} дела" if cases else ""
+            data["arbitration_sum"] = amount.group(1) if amount else ""
+
+    # Налоги и взносы (2023)
+    taxes = _first_match(XPATH["taxes_tile"], root)
+    if taxes is not None:
+        for col in XPATH["taxes_cols"](taxes):
+            title = _first_match(XPATH["col_title"], col)
+            num = _first_match(XPATH["tile_num"], col)
+            if title is not None and num is not None:
+                title_text = _text(title).strip().lower()
+                num_text = _text(num).strip()
+                if "налоги" in title_text:
+                    data["taxes_2023"] = num_text
+                if "взносы" in title_text:
+                    data["contributions_2023"] = num_text
+
+    # ОКВЭД информация
+    okved_link = _first_match(XPATH["okved_link"], root)
+    if okved_link is not None:
+        data["okved_url"] = base_url + okved_link.get("href")
+
+    return data
+
+
+def parse_okved_page(html: str) -> Dict[str, Any]:
+    """Сведения со страницы кода ОКВЭД: отрасль, места в рейтингах, крупнейшие компании"""
+    soup = BeautifulSoup(html, "lxml")
+    okved = {}
+
+    # Отрасль, основной вид и регион
+    for box in soup.select(".text-box"):
+        subtitle = box.find("div", class_="sub-title")
+        if not subtitle:
+            continue
+        title = subtitle.text.strip()
+        text = subtitle.next_sibling.strip() if subtitle.next_sibling else ""
+        if title == "Отрасль":
+            okved["industry"] = text
+        elif "Основной вид" in title:
+            okved["main_activity"] = text
+        elif title == "Регион":
+            okved["region"] = text
+
+    # Рейтинги и средняя выручка
+    for nb in soup.select(".number-box"):
+        title_elem = nb.find("div", class_="title")
+        num_elem = nb.find("span", class_="num")
+        if not title_elem or not num_elem:
+            continue
+
+        title = title_elem.get_text(" ").strip()
+        num = num_elem.text.strip()
+
+        if "в России" in title and "Место в отрасли" in title:
+            okved["rank_russia"] = num
+            m = re.search(r"из\s*([\d\s]+)", nb.text)
+            okved["total_russia"] = m.group(1).strip() if m else ""
+        elif "в регионе" in title:
+            okved["rank_region"] = num
+            m = re.search(r"из\s*([\d\s]+)", nb.text)
+            okved["total_region"] = m.group(1).strip() if m else ""
+        elif "Средняя выручка" in title:
+            okved["average_revenue"] = f"{num} млн руб."
+
+    # Топ-5 компаний
+    tops = []
+    for item in soup.select(".okved-list li.okved-item")[1:6]:
+        name_tag = item.select_one(".okved-item__text .name a") \
+                   or item.select_one(".okved-item__text .name")
+        if name_tag:
+            tops.append(name_tag.text.strip())
+    okved["top_companies"] = tops
+
+    # Общее количество кодов и дополнительные
+    header = soup.select_one(".content-frame__title")
+    m = re.search(r"\((\d+)\)", header.text) if header else None
+    total = int(m.group(1)) if m else 0
+    okved["total_codes"] = total
+    okved["additional_codes"] = max(0, total - 1)
+
+    return okved
@@ -0,0 +1,314 @@
+# backend/app/services/similarity_service.py
+import logging
+import threading
+import warnings
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, text
+
+from app.core.data_version import data_version
+from app.core.database import SessionLocal
+from app.models.report import Report
+
+logger = logging.getLogger(__name__)
+
+# Признаки финансового профиля компании (столбцы векторов)
+FEATURES = ("log_revenue", "margin", "leverage", "growth")
+# Строк за одно чтение при построении индекса
+LOAD_BATCH = 50000
+
+# Последний отчет каждой компании (с выручкой) и класс ее основного ОКВЭД;
+# выручка годом раньше - из предыдущего отчета или из revenue_prev
+FEATURES_SQL = """
+    SELECT f.company_id, p.class_code, f.revenue_cur, f.net_profit_cur, f.balance_assets_eoy, f.equity_eoy,
+           CASE WHEN f.year_before = f.year - 1 THEN f.revenue_before ELSE f.revenue_prev END AS revenue_before
+    FROM (
+        SELECT r.company_id, r.year, r.revenue_cur, r.revenue_prev, r.net_profit_cur,
+               r.balance_assets_eoy, r.equity_eoy,
+               lead(r.revenue_cur) OVER w AS revenue_before,
+               lead(r.year) OVER w AS year_before,
+               row_number() OVER w AS position
+        FROM report AS r
+        {where}
+        WINDOW w AS (PARTITION BY r.company_id ORDER BY r.year DESC)
+    ) AS f
+    JOIN company AS c ON c.company_id = f.company_id AND NOT c.inn_artifact
+    JOIN LATERAL (
+        SELECT class_code
+        FROM company_okved
+        WHERE company_okved.company_id = f.company_id AND company_okved.is_primary
+        ORDER BY code
+        LIMIT 1
+    ) AS p ON TRUE
+    WHERE f.position = 1 AND f.revenue_cur > 0 AND p.class_code IS NOT NULL
+"""
+
+
+def financial_features(revenue: np.ndarray, net_profit: np.ndarray, assets: np.ndarray,
+                       equity: np.ndarray, revenue_before: np.ndarray) -> np.ndarray:
+    """
+    Признаки FEATURES (компании x 4), NaN - признак не посчитать:
+    log10 выручки, рентабельность, доля заемных средств в активах, log роста выручки за год
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        log_revenue = np.log10(revenue)
+        margin = np.clip(net_profit / revenue, -1.0, 1.0)
+        leverage = np.where(assets > 0, np.clip((assets - equity) / assets, 0.0, 2.0), np.nan)
+        growth = np.where(revenue_before > 0, np.clip(np.log(revenue / revenue_before), -2.0, 2.0), np.nan)
+    return np.column_stack([log_revenue, margin, leverage, growth]).astype(np.float32)
+
+
+class _Partition(NamedTuple):
+    """Компании одного класса ОКВЭД: company_id по возрастанию и нормированные векторы"""
+    company_ids: np.ndarray
+    vectors: np.ndarray
+    # Квадраты длин векторов: расстояния до всех компаний класса - одно умножение матрицы на вектор
+    norms: np.ndarray
+    # Среднее и разброс признаков по классу: ими нормируются и добавленные позже компании
+    mean: np.ndarray
+    std: np.ndarray
+
+
+class _Snapshot(NamedTuple):
+    """Неизменяемое состояние индекса; обновление создает новый снимок.
+
+    company_ids  - все компании индекса по возрастанию
+    class_codes  - номер класса компании в classes
+    max_report_id - докуда прочитана таблица report (для дозагрузки)
+    report_count  - сколько строк report было видно при чтении max_report_id
+    """
+    partitions: Dict[str, _Partition]
+    classes: List[str]
+    company_ids: np.ndarray
+    class_codes: np.ndarray
+    max_report_id: int
+    report_count: int
+
+
+EMPTY_SNAPSHOT = _Snapshot({}, [], np.empty(0, np.int32), np.empty(0, np.int16), 0, 0)
+
+
+def _feature_stats(features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Среднее и разброс признаков по классу без учета пропусков (нет данных - 0 и 1)"""
+    with warnings.catch_warnings():
+        # Признак, пропущенный у всех компаний класса
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nan_to_num(np.nanmean(features, axis=0))
+        std = np.nanstd(features, axis=0)
+    std = np.where(np.isfinite(std) & (std > 0), std, 1.0)
+    return mean.astype(np.float32), std.astype(np.float32)
+
+
+def _normalize(features: np.ndarray, mean: np.ndarray, std: np.ndarray) -> np.ndarray:
+    """z-оценка признаков; пропуск - среднее по классу (0)"""
+    return np.nan_to_num((features - mean) / std).astype(np.float32)
+
+
+def _partition(company_ids: np.ndarray, vectors: np.ndarray, mean: np.ndarray, std: np.ndarray) -> _Partition:
+    order = np.argsort(company_ids, kind="stable")
+    vectors = np.ascontiguousarray(vectors[order])
+    return _Partition(company_ids[order], vectors, np.einsum("ij,ij->i", vectors, vectors), mean, std)
+
+
+class SimilarityIndex:
+    """Ближайшие по финансовому профилю компании того же класса ОКВЭД.
+
+    Каждая компания - вектор нормированных признаков FEATURES по последнему отчету;
+    векторы хранятся массивами numpy по классам основного ОКВЭД, поиск - полный
+    перебор расстояний внутри класса без запросов к БД. Новые и измененные отчеты
+    (report_id новее прочитанного) дозагружаются периодически; если число строк
+    с report_id до прочитанного изменилось (отчет закоммичен позже отчетов с большими
+    номерами или удален), индекс перестраивается целиком.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._snapshot is not None
+
+    def __len__(self) -> int:
+        snapshot = self._snapshot
+        return len(snapshot.company_ids) if snapshot else 0
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "ready": snapshot is not None,
+            "companies": len(snapshot.company_ids) if snapshot else 0,
+            "classes": len(snapshot.partitions) if snapshot else 0,
+        }
+
+    @staticmethod
+    def _load_features(db, company_ids: Optional[List[int]] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """company_id, класс ОКВЭД и признаки из report (company_ids - только эти компании)"""
+        where, params = "", {}
+        if company_ids is not None:
+            where, params = "WHERE r.company_id = ANY(:company_ids)", {"company_ids": company_ids}
+
+        result = db.execute(
+            text(FEATURES_SQL.format(where=where)), params, execution_options={"yield_per": LOAD_BATCH}
+        )
+        ids, classes, values = [np.empty(0, np.int32)], [np.empty(0, object)], [np.empty((0, 5))]
+        for rows in result.partitions():
+            ids.append(np.fromiter((row.company_id for row in rows), dtype=np.int32, count=len(rows)))
+            classes.append(np.array([row.class_code for row in rows], dtype=object))
+            # None (нет значения) -> NaN
+            values.append(np.array(
+                [(row.revenue_cur, row.net_profit_cur, row.balance_assets_eoy, row.equity_eoy, row.revenue_before)
+                 for row in rows], dtype=float
+            ))
+
+        return np.concatenate(ids), np.concatenate(classes), financial_features(*np.concatenate(values).T)
+
+    @staticmethod
+    def _with_partitions(partitions: Dict[str, _Partition], max_report_id: int, report_count: int) -> _Snapshot:
+        """Снимок с новыми классами и пересчитанным соответствием компания -> класс"""
+        partitions = {code: part for code, part in partitions.items() if len(part.company_ids)}
+        classes = sorted(partitions)
+        if classes:
+            company_ids = np.concatenate([partitions[code].company_ids for code in classes])
+            class_codes = np.concatenate([
+                np.full(len(partitions[code].company_ids), i, dtype=np.int16) for i, code in enumerate(classes)
+            ])
+            order = np.argsort(company_ids, kind="stable")
+            company_ids, class_codes = company_ids[order], class_codes[order]
+        else:
+            company_ids, class_codes = EMPTY_SNAPSHOT.company_ids, EMPTY_SNAPSHOT.class_codes
+        return _Snapshot(partitions, classes, company_ids, class_codes, max_report_id, report_count)
+
+    def _build(self, db, max_report_id: int, report_count: int) -> _Snapshot:
+        ids, classes, features = self._load_features(db)
+        partitions = {}
+        for code in set(classes.tolist()):
+            mask = classes == code
+            mean, std = _feature_stats(features[mask])
+            partitions[code] = _partition(ids[mask], _normalize(features[mask], mean, std), mean, std)
+        return self._with_partitions(partitions, max_report_id, report_count)
+
+    def _update(self, db, snapshot: _Snapshot, max_report_id: int, report_count: int) -> _Snapshot:
+        """Пересчитывает векторы компаний с новыми отчетами"""
+        query = db.query(Report.company_id).filter(Report.report_id > snapshot.max_report_id).distinct()
+        changed = np.array(sorted(row.company_id for row in query), dtype=np.int32)
+        if not len(changed):
+            return snapshot._replace(max_report_id=max_report_id, report_count=report_count)
+
+        ids, classes, features = self._load_features(db, changed.tolist())
+        partitions = dict(snapshot.partitions)
+
+        # Измененные компании убираем из их прежних классов
+        positions = np.searchsorted(snapshot.company_ids, changed)
+        positions = positions[positions < len(snapshot.company_ids)]
+        indexed = positions[np.isin(snapshot.company_ids[positions], changed)]
+        for class_index in np.unique(snapshot.class_codes[indexed]):
+            code = snapshot.classes[class_index]
+            part = partitions[code]
+            keep = ~np.isin(part.company_ids, changed)
+            partitions[code] = _partition(part.company_ids[keep], part.vectors[keep], part.mean, part.std)
+
+        # и добавляем в новые: нормировка - по среднему и разбросу класса из полного построения
+        for code in set(classes.tolist()):
+            mask = classes == code
+            part = partitions.get(code)
+            mean, std = (part.mean, part.std) if part is not None else _feature_stats(features[mask])
+            vectors = _normalize(features[mask], mean, std)
+            if part is not None:
+                partitions[code] = _partition(
+                    np.concatenate([part.company_ids, ids[mask]]), np.concatenate([part.vectors, vectors]), mean, std
+                )
+            else:
+                partitions[code] = _partition(ids[mask], vectors, mean, std)
+
+        return self._with_partitions(partitions, max_report_id, report_count)
+
+    def refresh(self, full: bool = False) -> int:
+        """Дозагружает новые отчеты (full - перестроить с нуля). Возвращает число компаний"""
+        with self._lock:
+            db = SessionLocal()
+            try:
+                # Отметки читаются одним запросом до загрузки. report_id выдается до коммита, поэтому
+                # отчет может стать видимым позже отчетов с большими номерами и оказаться ниже
+                # прочитанного max_report_id; такие отчеты (и удаления) меняют число строк до прежней
+                # отметки - тогда индекс перестраивается целиком, а не дозагружается по report_id
+                previous = self._snapshot
+                max_report_id, report_count, counted_before = db.query(
+                    func.max(Report.report_id),
+                    func.count(),
+                    func.count().filter(Report.report_id <= (previous.max_report_id if previous else 0)),
+                ).one()
+                max_report_id = max_report_id or 0
+                if not full and previous is not None and counted_before != previous.report_count:
+                    logger.info("Индекс похожих компаний: изменились отчеты до прочитанной отметки, перестроение")
+                    full = True
+                if full or previous is None:
+                    snapshot = self._build(db, max_report_id, report_count)
+                else:
+                    snapshot = self._update(db, previous, max_report_id, report_count)
+            finally:
+                db.close()
+
+            before = len(self._snapshot.company_ids) if self._snapshot else 0
+            self._snapshot = snapshot
+
+        if full or before != len(snapshot.company_ids):
+            logger.info(f"Индекс похожих компаний: {len(snapshot.company_ids)} компаний, "
+                        f"{len(snapshot.partitions)} классов ОКВЭД")
+        return len(snapshot.company_ids)
+
+    def similar(self, company_id: int, limit: int = 20) -> Optional[List[Tuple[int, float]]]:
+        """
+        Ближайшие компании того же класса ОКВЭД: [(company_id, расстояние), ...] по возрастанию расстояния.
+        None - индекс не готов или компании в нем нет (нет отчета с выручкой или кода ОКВЭД)
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+
+        position = int(np.searchsorted(snapshot.company_ids, company_id))
+        if position >= len(snapshot.company_ids) or snapshot.company_ids[position] != company_id:
+            return None
+
+        part = snapshot.partitions[snapshot.classes[snapshot.class_codes[position]]]
+        row = int(np.searchsorted(part.company_ids, company_id))
+        vector = part.vectors[row]
+        distances = np.maximum(part.norms - 2 * (part.vectors @ vector) + part.norms[row], 0)
+        distances[row] = np.inf
+
+        count = min(limit, len(distances) - 1)
+        if count <= 0:
+            return []
+        nearest = np.argpartition(distances, count - 1)[:count]
+        nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        return [(int(part.company_ids[i]), float(np.sqrt(distances[i]))) for i in nearest]
+
+    def _run(self, interval: int):
+        """Фоновый поток: построение индекса, затем периодическая дозагрузка новых отчетов"""
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Ошибка обновления индекса похожих компаний: {e}")
+            if self._stop.wait(interval):
+                break
+
+    def start(self, interval: int):
+        """Запускает построение и обновление индекса в фоновом потоке"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="similarity-index", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+similarity_index = SimilarityIndex()
+
+# После перезагрузки данных (новые коды ОКВЭД и отчеты выгрузки) индекс перестраивается целиком
+data_version.on_change(lambda: similarity_index.refresh(full=True))
@@ -0,0 +1,253 @@
+# backend/app/services/suggest_service.py
+import heapq
+import logging
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import not_
+
+from app.core.config import settings
+from app.core.data_version import data_version
+from app.core.database import SessionLocal
+from app.models.company import Company
+from app.services.database_service import DatabaseService
+
+logger = logging.getLogger(__name__)
+
+# Все, кроме букв и цифр, заменяется пробелом
+NON_WORD_RE = re.compile(r"[\W_]+")
+# Позиций слов в одной сортировке: ключи сортировки (строки) существуют только для одной пачки
+SORT_CHUNK = 200_000
+# Записей, после которых накопленные части текста, названий и ИНН склеиваются в одну строку
+JOIN_CHUNK = 50_000
+
+
+def normalize_text(value: str) -> str:
+    """Нижний регистр, ё -> е, кавычки и знаки препинания -> пробелы"""
+    return NON_WORD_RE.sub(" ", (value or "").lower().replace("ё", "е")).strip()
+
+
+class Suggestion(NamedTuple):
+    company_id: int
+    name: str
+    inn: str
+
+
+class _Snapshot(NamedTuple):
+    """Неизменяемое состояние индекса; обновление создает новый снимок.
+
+    text            - все записи вида "нормализованное название инн\\n" одной строкой
+    record_starts   - начало каждой записи в text (по возрастанию)
+    company_ids     - company_id записи
+    names           - исходные названия одной строкой, name_offsets - границы (n + 1 значение)
+    inns            - ИНН одной строкой, inn_offsets - границы (у компании без ИНН - пустой)
+    entries         - позиции начала слов в text, отсортированные по тексту от позиции
+    """
+    text: str
+    record_starts: array
+    company_ids: array
+    names: str
+    name_offsets: array
+    inns: str
+    inn_offsets: array
+    entries: array
+    max_company_id: int
+
+
+EMPTY_SNAPSHOT = _Snapshot("", array("I"), array("i"), "", array("I", [0]), "", array("I", [0]), array("I"), 0)
+
+
+class SuggestIndex:
+    """Префиксный индекс по названиям и ИНН компаний для подсказок при вводе.
+
+    Хранит данные в строках и массивах array вместо объектов на каждую компанию:
+    поиск - двоичный поиск по отсортированным позициям начала слов, без запросов к БД.
+    """
+
+    def __init__(self, key_length: int = 32):
+        # Сравнение ключей ограничено key_length символами, запрос обрезается так же
+        self.key_length = key_length
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._snapshot is not None
+
+    def __len__(self) -> int:
+        snapshot = self._snapshot
+        return len(snapshot.company_ids) if snapshot else 0
+
+    def _key(self, text: str):
+        """Функция ключа сортировки: текст записи от позиции до конца строки"""
+        key_length = self.key_length
+
+        def key(pos: int) -> str:
+            end = text.find("\n", pos, pos + key_length)
+            return text[pos:end if end != -1 else pos + key_length]
+
+        return key
+
+    def _extend(self, snapshot: _Snapshot, rows) -> _Snapshot:
+        """Новый снимок: старые записи плюс rows [(company_id, name, inn), ...]"""
+        base = len(snapshot.text)
+        text_parts, parts, new_entries = [snapshot.text], [], array("I")
+        record_starts = array("I", snapshot.record_starts)
+        company_ids = array("i", snapshot.company_ids)
+        name_offsets = array("I", snapshot.name_offsets)
+        name_parts, names = [snapshot.names], []
+        name_length = name_offsets[-1]
+        inn_offsets = array("I", snapshot.inn_offsets)
+        inn_parts, inns = [snapshot.inns], []
+        inn_length = inn_offsets[-1]
+        max_company_id = snapshot.max_company_id
+        pos = base
+
+        for company_id, name, inn in rows:
+            inn = DatabaseService.normalize_inn(inn)
+            record = f"{normalize_text(name)} {inn}".strip()
+            if not record:
+                continue
+
+            record_starts.append(pos)
+            company_ids.append(company_id)
+            names.append(name)
+            name_length += len(name)
+            name_offsets.append(name_length)
+            inns.append(inn)
+            inn_length += len(inn)
+            inn_offsets.append(inn_length)
+            max_company_id = max(max_company_id, company_id)
+
+            # Каждое слово (и ИНН) - отдельная точка входа в индекс
+            new_entries.append(pos)
+            for i, char in enumerate(record):
+                if char == " ":
+                    new_entries.append(pos + i + 1)
+
+            parts.append(record)
+            pos += len(record) + 1
+
+            # Не держим по строке на каждую запись до конца загрузки
+            if len(parts) >= JOIN_CHUNK:
+                text_parts.append("\n".join(parts) + "\n")
+                name_parts.append("".join(names))
+                inn_parts.append("".join(inns))
+                parts, names, inns = [], [], []
+
+        if pos == base:
+            return snapshot
+
+        text_parts.append("\n".join(parts) + "\n" if parts else "")
+        name_parts.append("".join(names))
+        inn_parts.append("".join(inns))
+        text = "".join(text_parts)
+        del text_parts, parts
+        key = self._key(text)
+
+        # Сортировка пачками по SORT_CHUNK и слияние отсортированных пачек со старыми позициями:
+        # heapq.merge держит по одному ключу на пачку, поэтому строк-ключей одновременно
+        # не больше SORT_CHUNK, а не по одной на каждое слово
+        chunks = [
+            array("I", sorted(new_entries[i:i + SORT_CHUNK], key=key))
+            for i in range(0, len(new_entries), SORT_CHUNK)
+        ]
+        del new_entries
+        entries = array("I", heapq.merge(snapshot.entries, *chunks, key=key))
+
+        return _Snapshot(
+            text, record_starts, company_ids, "".join(name_parts), name_offsets,
+            "".join(inn_parts), inn_offsets, entries, max_company_id
+        )
+
+    def _load(self, snapshot: _Snapshot, batch_size: int = 50000) -> _Snapshot:
+        """Дочитывает из БД компании с company_id больше уже проиндексированных"""
+        db = SessionLocal()
+        try:
+            query = db.query(Company.company_id, Company.name, Company.inn).filter(
+                Company.company_id > snapshot.max_company_id,
+                not_(Company.inn_artifact)
+            ).order_by(Company.company_id)
+
+            rows = query.yield_per(batch_size)
+            return self._extend(snapshot, ((row.company_id, row.name or "", row.inn or "") for row in rows))
+        finally:
+            db.close()
+
+    def refresh(self, full: bool = False) -> int:
+        """Добавляет в индекс новые компании (full - перестроить с нуля). Возвращает число записей"""
+        with self._lock:
+            snapshot = EMPTY_SNAPSHOT if full or self._snapshot is None else self._snapshot
+            before = len(snapshot.company_ids)
+            snapshot = self._load(snapshot)
+            self._snapshot = snapshot
+
+        added = len(snapshot.company_ids) - before
+        if added:
+            logger.info(f"Индекс подсказок: +{added} компаний, всего {len(snapshot.company_ids)}")
+        return len(snapshot.company_ids)
+
+    def search(self, query: str, limit: int = 10) -> List[Suggestion]:
+        """Компании, у которых название (с любого слова) или ИНН начинается с query"""
+        snapshot = self._snapshot
+        prefix = normalize_text(query)[:self.key_length]
+        if snapshot is None or not prefix:
+            return []
+
+        key = self._key(snapshot.text)
+        start = bisect_left(snapshot.entries, prefix, key=key)
+
+        # Просматриваем ограниченное число совпадений и выбираем лучшие:
+        # совпадение ближе к началу названия, затем более короткие названия
+        candidates = {}
+        for i in range(start, min(start + limit * 50, len(snapshot.entries))):
+            pos = snapshot.entries[i]
+            if not key(pos).startswith(prefix):
+                break
+
+            record = bisect_right(snapshot.record_starts, pos) - 1
+            offset = pos - snapshot.record_starts[record]
+            if record not in candidates or offset < candidates[record][0]:
+                name_length = snapshot.name_offsets[record + 1] - snapshot.name_offsets[record]
+                candidates[record] = (offset, name_length, record)
+
+        best = sorted(candidates.values())[:limit]
+        return [self._suggestion(snapshot, record) for _, _, record in best]
+
+    @staticmethod
+    def _suggestion(snapshot: _Snapshot, record: int) -> Suggestion:
+        name = snapshot.names[snapshot.name_offsets[record]:snapshot.name_offsets[record + 1]]
+        inn = snapshot.inns[snapshot.inn_offsets[record]:snapshot.inn_offsets[record + 1]]
+        return Suggestion(snapshot.company_ids[record], name, inn)
+
+    def _run(self, interval: int):
+        """Фоновый поток: построение индекса, затем периодическая дозагрузка новых компаний"""
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Ошибка обновления индекса подсказок: {e}")
+            if self._stop.wait(interval):
+                break
+
+    def start(self, interval: int):
+        """Запускает построение и обновление индекса в фоновом потоке"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="suggest-index", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+suggest_index = SuggestIndex(settings.suggest_key_length)
+
+# После перезагрузки данных индекс перестраивается целиком
+data_version.on_change(lambda: suggest_index.refresh(full=True))
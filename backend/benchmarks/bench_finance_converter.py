@@ -0,0 +1,173 @@
+"""
+Бенчмарк преобразования финансов DataNewton в отчеты.
+
+Сравнивает прежний convert_api_finance_to_reports (линейный поиск строки по
+списку показателей для каждой пары код/год, 6 полей отчета), тот же поиск для
+всех полей report и текущий convert_api_finance_to_reports (индекс код -> год
+за один проход). Сначала проверяет, что 6 прежних полей совпадают, затем
+печатает число ответов в секунду.
+
+Ответы генерируются: --codes строк в каждом разделе (в настоящих ответах
+DataNewton - несколько десятков) за --years лет.
+
+Запускать из каталога backend:
+
+    python -m benchmarks.bench_finance_converter --payloads 2000 --years 5
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from app.schemas.company import FinancialReport
+from app.services.report_service import (
+    RSBU_REPORT_FIELDS, convert_api_finance_to_reports, multiply_by_thousand, report_value
+)
+
+LEGACY_FIELDS = ("revenue_cur", "gross_profit_cur", "oper_profit_cur",
+                 "net_profit_cur", "balance_assets_eoy", "equity_eoy")
+
+
+def get_balance_value(balances, code, year):
+    """Прежний поиск значения в балансе (копия из companies.py)"""
+    try:
+        indicators = balances.get('indicators', [])
+        for indicator in indicators:
+            if indicator.get('code') == code:
+                return indicator.get('sum', {}).get(year, 0.0) or 0.0
+        return 0.0
+    except:
+        return 0.0
+
+
+def get_fin_result_value(fin_results, code, year):
+    """Прежний поиск значения в отчете о прибылях и убытках (копия из companies.py)"""
+    try:
+        indicators = fin_results.get('indicators', [])
+        for indicator in indicators:
+            if indicator.get('code') == code:
+                return indicator.get('sum', {}).get(year, 0.0) or 0.0
+        return 0.0
+    except:
+        return 0.0
+
+
+def find_indicator_sum(section, code, year):
+    """Поиск значения строки по списку показателей раздела; пропуск - None"""
+    for indicator in section.get('indicators', []):
+        if indicator.get('code') == code:
+            return indicator.get('sum', {}).get(year)
+    return None
+
+
+def legacy_convert(finance_data) -> List[FinancialReport]:
+    """Прежний convert_api_finance_to_reports: 6 полей, линейный поиск для каждого"""
+    reports = []
+
+    balances = finance_data.get('balances', {})
+    fin_results = finance_data.get('fin_results', {})
+
+    all_years = sorted(set(balances.get('years', []) + fin_results.get('years', [])))
+
+    for year in all_years:
+        year_str = str(year)
+        report = FinancialReport(
+            year=year,
+            revenue_cur=multiply_by_thousand(get_fin_result_value(fin_results, '2110', year_str)),
+            gross_profit_cur=multiply_by_thousand(get_fin_result_value(fin_results, '2100', year_str)),
+            oper_profit_cur=multiply_by_thousand(get_fin_result_value(fin_results, '2200', year_str)),
+            net_profit_cur=multiply_by_thousand(get_fin_result_value(fin_results, '2400', year_str)),
+            balance_assets_eoy=multiply_by_thousand(get_balance_value(balances, '1600', year_str)),
+            equity_eoy=multiply_by_thousand(get_balance_value(balances, '1300', year_str))
+        )
+        reports.append(report)
+
+    return sorted(reports, key=lambda x: x.year)
+
+
+def legacy_convert_all_fields(finance_data) -> List[FinancialReport]:
+    """Линейный поиск для каждого поля report (как прежний способ, но для всех полей)"""
+    reports = []
+
+    balances = finance_data.get('balances', {})
+    fin_results = finance_data.get('fin_results', {})
+    sections = {'balances': balances, 'fin_results': fin_results}
+
+    for year in sorted(set(balances.get('years', []) + fin_results.get('years', []))):
+        values = {}
+        for section, code, current_field, previous_field in RSBU_REPORT_FIELDS:
+            data = sections[section]
+            values[current_field] = report_value(current_field, find_indicator_sum(data, code, str(year)))
+            values[previous_field] = report_value(previous_field, find_indicator_sum(data, code, str(year - 1)))
+        reports.append(FinancialReport(year=year, **values))
+
+    return reports
+
+
+def generate_payload(rng: random.Random, codes: int, years: int) -> Dict[str, Any]:
+    """Ответ /v1/finance: нужные строки РСБУ в случайных местах списка среди прочих, с пропусками"""
+    year_list = list(range(2024 - years, 2024))
+
+    def section(prefix: int, required: List[str]) -> Dict[str, Any]:
+        other = [str(prefix + i * 10) for i in range(1, codes * 2) if str(prefix + i * 10) not in required]
+        section_codes = required + rng.sample(other, max(0, codes - len(required)))
+        rng.shuffle(section_codes)
+        indicators = [
+            {"code": code, "name": f"Строка {code}",
+             "sum": {str(year): rng.randint(-10 ** 6, 10 ** 7) for year in year_list if rng.random() > 0.1}}
+            for code in section_codes
+        ]
+        return {"years": year_list, "indicators": indicators}
+
+    required = {"balances": [], "fin_results": []}
+    for section_name, code, _, _ in RSBU_REPORT_FIELDS:
+        required[section_name].append(code)
+    return {
+        "balances": section(1100, required["balances"]),
+        "fin_results": section(2100, required["fin_results"]),
+    }
+
+
+def payloads_per_second(convert: Callable, payloads: List[Dict[str, Any]], rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for payload in payloads:
+            convert(payload)
+    return len(payloads) * rounds / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payloads", type=int, default=2000, help="Число сгенерированных ответов")
+    parser.add_argument("--codes", type=int, default=40, help="Строк в каждом разделе ответа")
+    parser.add_argument("--years", type=int, default=5, help="Лет в ответе")
+    parser.add_argument("--rounds", type=int, default=3, help="Сколько раз преобразовать каждый ответ")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    payloads = [generate_payload(rng, args.codes, args.years) for _ in range(args.payloads)]
+
+    mismatches = 0
+    for payload in payloads:
+        old = legacy_convert(payload)
+        new = convert_api_finance_to_reports(payload)
+        full = legacy_convert_all_fields(payload)
+        same = [report.model_dump(include={"year", *LEGACY_FIELDS}) for report in old] == \
+               [report.model_dump(include={"year", *LEGACY_FIELDS}) for report in new] and full == new
+        mismatches += not same
+    if mismatches:
+        sys.exit(f"Различий: {mismatches} из {len(payloads)} ответов")
+    print(f"Ответов: {len(payloads)}, результаты совпадают")
+
+    legacy = payloads_per_second(legacy_convert, payloads, args.rounds)
+    scan = payloads_per_second(legacy_convert_all_fields, payloads, args.rounds)
+    indexed = payloads_per_second(convert_api_finance_to_reports, payloads, args.rounds)
+    print(f"Прежний (6 полей, поиск по списку):  {legacy:.0f} ответов/с")
+    print(f"Поиск по списку для всех полей:      {scan:.0f} ответов/с")
+    print(f"Индекс код -> год, все поля:         {indexed:.0f} ответов/с (x{indexed / scan:.1f} к поиску)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Бенчмарк пакетного предсказания показателей.
+
+Генерирует отчеты N компаний (от 1 до 6 лет, с пропусками, нулями и убытками),
+сверяет FinancialPredictionService.predict_batch с predict_next_year на выборке
+компаний и печатает число компаний в секунду для обоих способов
+(predict_next_year - по выборке, predict_batch - на всех N).
+
+Запускать из каталога backend:
+
+    python -m benchmarks.bench_predict_batch --companies 100000 --sample 5000
+"""
+import argparse
+import logging
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+from app.schemas.company import FinancialReport
+from app.services.prediction_service import FinancialPredictionService, PREDICTED_METRICS
+
+YEARS = np.arange(2018, 2024)
+
+
+def generate_reports(companies: int, seed: int) -> List[List[FinancialReport]]:
+    """Случайные отчеты: тренд с шумом, пропуски (None), нули и отрицательная прибыль"""
+    rng = np.random.default_rng(seed)
+    result = []
+    for _ in range(companies):
+        first = rng.integers(0, len(YEARS))
+        years = YEARS[first:]
+        base = rng.lognormal(16, 2)
+        growth = rng.normal(0.05, 0.3)
+        reports = []
+        for i, year in enumerate(years):
+            values = {}
+            for metric in PREDICTED_METRICS:
+                value = base * (1 + growth) ** i * rng.normal(1, 0.2)
+                if metric == "net_profit_cur":
+                    value *= rng.normal(0.05, 0.1)
+                roll = rng.random()
+                values[metric] = None if roll < 0.1 else 0.0 if roll < 0.15 else round(float(value), 2)
+            reports.append(FinancialReport(year=int(year), **values))
+        result.append(reports)
+    return result
+
+
+def compare(companies_reports: List[List[FinancialReport]], batch) -> int:
+    """Число компаний, у которых predict_batch не совпал с predict_next_year"""
+    mismatches = 0
+    for i, reports in enumerate(companies_reports):
+        expected = FinancialPredictionService.predict_next_year(reports)
+        if expected is None:
+            same = not batch["valid"][i]
+        else:
+            same = batch["valid"][i] and batch["year"][i] == expected.year
+            for field in PREDICTED_METRICS + ("confidence",):
+                value = getattr(expected, field)
+                actual = batch[field][i]
+                if value is None:
+                    same = same and np.isnan(actual)
+                else:
+                    same = same and bool(np.isclose(actual, value, rtol=1e-6, atol=1e-6))
+        if not same:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"Компания {i}: {expected} != {{{', '.join(f'{k}: {v[i]}' for k, v in batch.items())}}}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--companies", type=int, default=100000, help="Число компаний")
+    parser.add_argument("--sample", type=int, default=5000,
+                        help="Сколько компаний сверить и посчитать через predict_next_year")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    # Предупреждения о компаниях с одним отчетом не нужны
+    logging.getLogger("app.services.prediction_service").setLevel(logging.ERROR)
+
+    started = time.perf_counter()
+    companies_reports = generate_reports(args.companies, args.seed)
+    years, metrics, present = FinancialPredictionService.batch_arrays(companies_reports)
+    print(f"Компаний: {args.companies}, подготовка данных: {time.perf_counter() - started:.1f} с")
+
+    started = time.perf_counter()
+    batch = FinancialPredictionService.predict_batch(years, metrics, present)
+    batch_time = time.perf_counter() - started
+
+    sample = companies_reports[:args.sample]
+    mismatches = compare(sample, batch)
+    if mismatches:
+        sys.exit(f"Различий: {mismatches} из {len(sample)} компаний")
+    print(f"Сверено компаний: {len(sample)}, результаты совпадают")
+
+    started = time.perf_counter()
+    for reports in sample:
+        FinancialPredictionService.predict_next_year(reports)
+    single_time = time.perf_counter() - started
+
+    single = len(sample) / single_time
+    vectorized = args.companies / batch_time
+    print(f"predict_next_year: {single:.0f} компаний/с")
+    print(f"predict_batch:     {vectorized:.0f} компаний/с ({batch_time * 1000:.0f} мс, x{vectorized / single:.0f})")
+
+
+if __name__ == "__main__":
+    main()
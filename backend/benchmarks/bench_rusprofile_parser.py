@@ -0,0 +1,198 @@
+"""
+Бенчмарк разбора страницы компании RusProfile.
+
+Сравнивает прежний разбор через BeautifulSoup (около 30 вызовов find/select
+по дереву) с parse_company_page (lxml и заранее скомпилированные XPath):
+сначала проверяет, что на каждой странице оба возвращают один и тот же словарь,
+затем печатает число страниц в секунду для каждого. На страницах, где прежний
+разбор завершался ошибкой (заголовок "Уставный капитал" без значения), новый
+должен вернуть данные с пустым authorized_capital.
+
+Синтетические страницы лежат в benchmarks/fixtures/rusprofile; сохраненные
+настоящие страницы можно передать через --fixtures.
+
+Запускать из каталога backend:
+
+    python -m benchmarks.bench_rusprofile_parser --rounds 50
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from bs4 import BeautifulSoup
+
+from app.services.rusprofile_parser import parse_company_page
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "rusprofile"
+BASE_URL = "https://www.rusprofile.ru"
+
+
+def legacy_extract_company_data(html: str, base_url: str) -> Dict[str, Any]:
+    """Прежний разбор через BeautifulSoup (копия RusProfileService._extract_company_data)"""
+    soup = BeautifulSoup(html, "lxml")
+    data = {}
+
+    try:
+        # Основные сведения
+        h1_tag = soup.find("h1", itemprop="name")
+        data["company_name"] = h1_tag.text.strip() if h1_tag else ""
+
+        tag = soup.find("span", id="clip_name-long")
+        data["full_name"] = tag.text.strip() if tag else ""
+
+        tag = soup.find("span", id="clip_ogrn")
+        data["ogrn"] = tag.text.strip() if tag else ""
+
+        tag = soup.find("span", id="clip_inn")
+        data["inn"] = tag.text.strip() if tag else ""
+
+        tag = soup.find("span", id="clip_kpp")
+        data["kpp"] = tag.text.strip() if tag else ""
+
+        tag = soup.find("dd", itemprop="foundingDate")
+        data["registration_date"] = tag.text.strip() if tag else ""
+
+        cap = soup.find("dt", string="Уставный капитал")
+        data["authorized_capital"] = cap.find_next("dd").text.strip() if cap else ""
+
+        sts = soup.find("span", class_="company-header__icon success") \
+              or soup.find("span", class_="company-header__icon danger")
+        data["status"] = sts.text.strip() if sts else ""
+
+        tag = soup.find("span", id="clip_address")
+        data["legal_address"] = tag.text.strip() if tag else ""
+
+        # Руководитель
+        dir_ = soup.find("a", href=re.compile(r"^/person/"))
+        data["director"] = dir_.text.strip() if dir_ else ""
+
+        # Коды статистики
+        for code in ("okpo", "okato", "oktmo", "okfs", "okogu", "okopf"):
+            tag = soup.find("span", id=f"clip_{code}")
+            data[code] = tag.text.strip() if tag else ""
+
+        # Учредитель и связи
+        founder = soup.select_one(".tile-item.founders-tile .founder-item__title a")
+        data["founder"] = founder.text.strip() if founder else ""
+
+        tag = soup.find("a", class_="num gtm_c_all")
+        data["total_connections"] = tag.text.strip() if tag else ""
+
+        tag = soup.find("a", class_="num gtm_c_1")
+        data["connections_by_address"] = tag.text.strip() if tag else ""
+
+        tag = soup.find("a", class_="num gtm_c_2")
+        data["connections_by_director"] = tag.text.strip() if tag else ""
+
+        tag = soup.find("a", class_="num gtm_c_3")
+        data["connections_by_founder"] = tag.text.strip() if tag else ""
+
+        # Госзакупки
+        gz = soup.find("div", class_="tile-item tab-parent gz-tile")
+        if gz:
+            dl = gz.find("dl", class_="founder-item__dl")
+            if dl:
+                dt_tag = dl.find("dt")
+                dd_tag = dl.find("dd")
+                data["government_contracts_count"] = dt_tag.text.strip() if dt_tag else ""
+                data["government_contracts_sum"] = dd_tag.text.strip() if dd_tag else ""
+            cont = gz.select_one(".founder-item__title a")
+            data["main_contractor"] = cont.text.strip() if cont else ""
+
+        # Арбитраж
+        arb = soup.find("div", class_="tile-item tab-parent arbitr-tile")
+        if arb:
+            num_elem = arb.find("div", class_="connexion-col__num tosmall")
+            if num_elem:
+                txt = num_elem.get_text(" ")
+                m1 = re.search(r"(\d+)\s*дел", txt)
+                m2 = re.search(r"на сумму\s*([\d\s]+(?:млн)?\s*руб)", txt)
+                data["arbitration_cases"] = f"{m1.group(1)} дела" if m1 else ""
+                data["arbitration_sum"] = m2.group(1) if m2 else ""
+
+        # Налоги и взносы (2023)
+        taxes_tile = soup.find("div", class_="tile-item taxes-tile")
+        if taxes_tile:
+            for col in taxes_tile.select(".connexion-col"):
+                title_elem = col.find("div", class_="connexion-col__title")
+                num_elem = col.find("div", class_="connexion-col__num tosmall")
+                if title_elem and num_elem:
+                    title = title_elem.text.strip().lower()
+                    num = num_elem.text.strip()
+                    if "налоги" in title:
+                        data["taxes_2023"] = num
+                    if "взносы" in title:
+                        data["contributions_2023"] = num
+
+        # ОКВЭД информация
+        okved_link = soup.find("a", href=re.compile(r"^/okved/"))
+        if okved_link:
+            okved_url = base_url + okved_link["href"]
+            data["okved_url"] = okved_url
+
+        return data
+
+    except Exception as e:
+        print(f"Ошибка парсинга данных компании: {e}")
+        return {"parse_error": str(e)}
+
+
+def current_extract_company_data(html: str, base_url: str) -> Dict[str, Any]:
+    """Новый разбор с той же обработкой ошибок, что в RusProfileService._extract_company_data"""
+    try:
+        return parse_company_page(html, base_url)
+    except Exception as e:
+        return {"parse_error": str(e)}
+
+
+def pages_per_second(parse, pages, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for html in pages:
+            parse(html, BASE_URL)
+    return rounds * len(pages) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR, help="Каталог с HTML-страницами компаний")
+    parser.add_argument("--rounds", type=int, default=20, help="Сколько раз разобрать каждую страницу")
+    args = parser.parse_args()
+
+    paths = sorted(args.fixtures.glob("*.html"))
+    if not paths:
+        sys.exit(f"В {args.fixtures} нет файлов *.html")
+    pages = [path.read_text(encoding="utf-8") for path in paths]
+
+    mismatches = 0
+    for path, html in zip(paths, pages):
+        old = legacy_extract_company_data(html, BASE_URL)
+        new = current_extract_company_data(html, BASE_URL)
+        if "parse_error" in old:
+            if "parse_error" in new or new.get("authorized_capital") != "":
+                mismatches += 1
+                print(f"{path.name}: прежний разбор - ошибка {old['parse_error']!r}, новый - {new!r}")
+            else:
+                print(f"{path.name}: прежний разбор - ошибка, новый вернул данные без уставного капитала")
+            continue
+        if old != new or list(old) != list(new):
+            mismatches += 1
+            print(f"{path.name}: результаты различаются")
+            for key in sorted(set(old) | set(new)):
+                if old.get(key) != new.get(key):
+                    print(f"  {key}: {old.get(key)!r} != {new.get(key)!r}")
+    if mismatches:
+        sys.exit(f"Различий: {mismatches} из {len(pages)} страниц")
+    print(f"Страниц: {len(pages)}, результаты совпадают")
+
+    legacy = pages_per_second(legacy_extract_company_data, pages, args.rounds)
+    current = pages_per_second(current_extract_company_data, pages, args.rounds)
+    print(f"BeautifulSoup: {legacy:.1f} страниц/с")
+    print(f"lxml + XPath:  {current:.1f} страниц/с (x{current / legacy:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Нагрузочный тест эндпоинта аналитики компании.
+
+Отправляет --requests запросов GET /api/companies/{inn}/analytics, не больше
+--concurrency одновременно, и печатает пропускную способность и p50/p99.
+Сравните с прогоном при --concurrency 1: если обращения к внешним API
+блокируют event loop, запросы выполняются по очереди и число запросов
+в секунду не растет с ростом --concurrency, а p50 растет пропорционально ему.
+
+Запускать из каталога backend при работающем API:
+
+    python -m benchmarks.load_analytics --base-url http://localhost:8000 \\
+        --inn 7707083893 --inn 7736050003 --requests 100 --concurrency 20
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+import numpy as np
+
+
+async def run_load(base_url, inns, total, concurrency, timeout):
+    """Время каждого запроса (мс), коды ответов и время всего прогона (с)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], {}
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout,
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+
+        async def one(i):
+            inn = inns[i % len(inns)]
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(f"/api/companies/{inn}/analytics")
+                    status = response.status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+
+    return np.array(latencies), statuses, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000", help="Адрес API")
+    parser.add_argument("--inn", action="append", required=True, help="ИНН компании (можно несколько раз)")
+    parser.add_argument("--requests", type=int, default=100, help="Всего запросов")
+    parser.add_argument("--concurrency", type=int, default=20, help="Одновременных запросов")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Таймаут запроса, с")
+    args = parser.parse_args()
+
+    latencies, statuses, elapsed = asyncio.run(
+        run_load(args.base_url, args.inn, args.requests, args.concurrency, args.timeout)
+    )
+
+    print(f"Запросов: {args.requests}, одновременно: {args.concurrency}")
+    print(f"Ответы: {statuses}")
+    print(f"Время прогона: {elapsed:.2f} с, {args.requests / elapsed:.1f} запросов/с")
+    print(f"p50: {np.percentile(latencies, 50):.0f} мс, p99: {np.percentile(latencies, 99):.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
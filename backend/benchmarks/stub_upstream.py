@@ -0,0 +1,218 @@
+"""
+Локальная замена DataNewton и RusProfile для нагрузочных тестов.
+
+Отвечает на /v1/counterparty, /v1/finance (DataNewton) и /search, /okved/{код}
+(RusProfile) записанными ответами из --fixtures с искусственной задержкой
+и долей ошибок, поэтому прогоны всего стека повторяемы и не тратят платные
+и ограниченные по частоте запросы к настоящим сервисам.
+
+Ответы ищутся по ИНН (код ОКВЭД для /okved): counterparty/<инн>.json,
+finance/<инн>.json, search/<инн>.html, okved/<код>.html. Если файла нет,
+отдается _default из того же каталога (--missing 404 - ответ 404), для
+страницы поиска - benchmarks/fixtures/rusprofile/full_company.html.
+
+С --record-datanewton / --record-rusprofile отсутствующие ответы запрашиваются
+у настоящего сервиса и сохраняются в --fixtures (ключ DataNewton не сохраняется).
+
+Задержка и доля ошибок задаются для всех методов или для одного
+(counterparty, finance, search, okved):
+
+    python -m benchmarks.stub_upstream --port 9100 --latency 200 --latency finance=800 \\
+        --jitter 50 --error-rate 0.02 --hang-rate search=0.01 --seed 1
+
+Приложение направляется на замену через переменные окружения:
+
+    DATANEWTON_BASE_URL=http://127.0.0.1:9100 RUSPROFILE_BASE_URL=http://127.0.0.1:9100 \\
+        uvicorn app.main:app --port 8000
+
+Счетчики ответов по методам - GET /_stats.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+from pathlib import Path
+from typing import Dict, Optional
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "upstream"
+DEFAULT_SEARCH_PAGE = Path(__file__).parent / "fixtures" / "rusprofile" / "full_company.html"
+METHODS = ("counterparty", "finance", "search", "okved")
+# Имя файла ответа: только цифры, точки и буквы (без выхода из каталога)
+SAFE_KEY_RE = re.compile(r"[\w.]+")
+
+
+def parse_per_method(values, default: float) -> Dict[str, float]:
+    """Значения вида "200" (для всех методов) или "finance=800" (для одного)"""
+    result = {method: default for method in METHODS}
+    for value in values or []:
+        if "=" in value:
+            method, number = value.split("=", 1)
+            if method not in METHODS:
+                raise argparse.ArgumentTypeError(f"Неизвестный метод: {method}")
+            result[method] = float(number)
+        else:
+            result = {method: float(value) for method in METHODS}
+    return result
+
+
+class Upstream:
+    """Ответы из записанных файлов с задержкой, ошибками и, при записи, запросами к настоящим сервисам"""
+
+    def __init__(self, args):
+        self.fixtures: Path = args.fixtures
+        self.latency = parse_per_method(args.latency, 0.0)
+        self.error_rate = parse_per_method(args.error_rate, 0.0)
+        self.hang_rate = parse_per_method(args.hang_rate, 0.0)
+        self.jitter = args.jitter
+        self.error_status = args.error_status
+        self.hang_seconds = args.hang_seconds
+        self.missing = args.missing
+        self.record = {"datanewton": args.record_datanewton, "rusprofile": args.record_rusprofile}
+        self.random = random.Random(args.seed)
+        self.client: Optional[httpx.AsyncClient] = None
+        self.stats: Dict[str, Dict[str, int]] = {method: {} for method in METHODS}
+
+    def _count(self, method: str, outcome: str) -> None:
+        self.stats[method][outcome] = self.stats[method].get(outcome, 0) + 1
+
+    async def _delay(self, method: str) -> Optional[Response]:
+        """Задержка ответа; ответ-ошибка или None, если отвечать нужно записанными данными"""
+        roll = self.random.random()
+        if roll < self.hang_rate[method]:
+            self._count(method, "hang")
+            await asyncio.sleep(self.hang_seconds)
+        latency = max(0.0, self.latency[method] + self.random.uniform(-self.jitter, self.jitter))
+        await asyncio.sleep(latency / 1000)
+        if self.random.random() < self.error_rate[method]:
+            self._count(method, "error")
+            return Response(status_code=self.error_status, content="stub: injected error")
+        return None
+
+    def _path(self, method: str, key: str, suffix: str) -> Path:
+        return self.fixtures / method / f"{key}{suffix}"
+
+    def _load(self, method: str, key: str, suffix: str) -> Optional[str]:
+        path = self._path(method, key, suffix) if SAFE_KEY_RE.fullmatch(key) else None
+        if path is not None and path.exists():
+            return path.read_text(encoding="utf-8")
+        return None
+
+    def _default(self, method: str, suffix: str) -> Optional[str]:
+        if self.missing == "404":
+            return None
+        default = self._load(method, "_default", suffix)
+        if default is None and method == "search" and DEFAULT_SEARCH_PAGE.exists():
+            default = DEFAULT_SEARCH_PAGE.read_text(encoding="utf-8")
+        return default
+
+    async def _record(self, service: str, method: str, key: str, suffix: str,
+                      path: str, params) -> Optional[str]:
+        """Запрос к настоящему сервису и сохранение ответа (только 200)"""
+        base_url = self.record[service]
+        if not base_url or not SAFE_KEY_RE.fullmatch(key):
+            return None
+        if self.client is None:
+            self.client = httpx.AsyncClient(timeout=60, follow_redirects=True)
+
+        response = await self.client.get(f"{base_url}{path}", params=params)
+        if response.status_code != 200:
+            self._count(method, f"record_{response.status_code}")
+            return None
+
+        body = response.text
+        if suffix == ".json":
+            body = json.dumps(response.json(), ensure_ascii=False, indent=2)
+        target = self._path(method, key, suffix)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(body, encoding="utf-8")
+        return body
+
+    async def answer(self, service: str, method: str, key: str, request: Request) -> Response:
+        error = await self._delay(method)
+        if error is not None:
+            return error
+
+        suffix = ".json" if service == "datanewton" else ".html"
+        media_type = "application/json" if suffix == ".json" else "text/html; charset=utf-8"
+
+        body = self._load(method, key, suffix)
+        outcome = "fixture"
+        if body is None:
+            body = await self._record(service, method, key, suffix, request.url.path, request.query_params)
+            outcome = "recorded"
+        if body is None:
+            body = self._default(method, suffix)
+            outcome = "default"
+        if body is None:
+            self._count(method, "missing")
+            return Response(status_code=404, content=f"stub: no fixture for {method}/{key}")
+
+        self._count(method, outcome)
+        return Response(content=body, media_type=media_type)
+
+
+def create_app(upstream: Upstream) -> FastAPI:
+    app = FastAPI(title="DataNewton / RusProfile stub")
+
+    @app.get("/v1/counterparty")
+    async def counterparty(request: Request, inn: str = ""):
+        return await upstream.answer("datanewton", "counterparty", inn.strip(), request)
+
+    @app.get("/v1/finance")
+    async def finance(request: Request, inn: str = ""):
+        return await upstream.answer("datanewton", "finance", inn.strip(), request)
+
+    @app.get("/search")
+    async def search(request: Request, query: str = ""):
+        return await upstream.answer("rusprofile", "search", query.strip(), request)
+
+    @app.get("/okved/{code}")
+    async def okved(request: Request, code: str):
+        return await upstream.answer("rusprofile", "okved", code, request)
+
+    @app.get("/_stats")
+    async def stats():
+        return upstream.stats
+
+    @app.on_event("shutdown")
+    async def close_client():
+        if upstream.client is not None:
+            await upstream.client.aclose()
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR, help="Каталог записанных ответов")
+    parser.add_argument("--latency", action="append", help="Задержка ответа, мс (можно метод=мс)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Случайное отклонение задержки, ±мс")
+    parser.add_argument("--error-rate", action="append", help="Доля ответов с ошибкой, 0..1 (можно метод=доля)")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP-код ответа с ошибкой")
+    parser.add_argument("--hang-rate", action="append",
+                        help="Доля ответов с долгим зависанием (проверка сроков ответа), 0..1 (можно метод=доля)")
+    parser.add_argument("--hang-seconds", type=float, default=60.0, help="Длительность зависания, с")
+    parser.add_argument("--missing", choices=("default", "404"), default="default",
+                        help="Ответ для ИНН без записанного файла")
+    parser.add_argument("--record-datanewton", help="Адрес настоящего DataNewton для записи отсутствующих ответов")
+    parser.add_argument("--record-rusprofile", help="Адрес настоящего RusProfile для записи отсутствующих ответов")
+    parser.add_argument("--seed", type=int, help="Начальное значение генератора задержек и ошибок")
+    args = parser.parse_args()
+
+    try:
+        upstream = Upstream(args)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    uvicorn.run(create_app(upstream), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()